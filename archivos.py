@@ -0,0 +1,151 @@
+import array
+import mmap
+import os
+import estado
+
+SALTO_DE_LINEA = "\n"
+CELDAS_DE_NIVEL = frozenset(b" #$@.*+-_")
+EXTENSION_INDICE = ".indice"
+VERSION_INDICE = 1
+
+class PaqueteNiveles:
+	"""
+	Representa un archivo con muchos niveles que se leen a medida que se piden.
+	Al abrirlo sólo se carga un índice con la posición en bytes de cada nivel,
+	guardado junto al archivo (y regenerado si el archivo cambia de tamaño o de
+	fecha de modificación); cada nivel se lee del archivo mapeado en memoria
+	recién cuando se lo pide, así que abrir un paquete de decenas de miles de
+	niveles no cuesta más que abrir uno chico.
+
+	Un nivel es un bloque de líneas consecutivas formadas sólo por celdas del
+	juego (y al menos una pared). Cualquier otra línea, como los títulos
+	"Level 1", los comentarios o las líneas en blanco, separa los niveles.
+	"""
+
+	def __init__(self, ruta_archivo):
+		"""Abre el paquete de niveles guardado en la ruta recibida."""
+		self.ruta = ruta_archivo
+		self.mapa = None
+		with open(ruta_archivo, "rb") as archivo:
+			if os.fstat(archivo.fileno()).st_size > 0:
+				self.mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+		self.posiciones = self.cargar_indice()
+
+	def __len__(self):
+		return len(self.posiciones) // 2
+
+	def __getitem__(self, indice):
+		"""Devuelve el nivel de la posición recibida, como lista de filas de igual longitud."""
+		if not 0 <= indice < len(self):
+			raise IndexError("no existe el nivel")
+		inicio, fin = self.posiciones[2 * indice], self.posiciones[2 * indice + 1]
+		texto = self.mapa[inicio:fin].decode()
+		nivel = [linea.rstrip().replace("-", " ").replace("_", " ") for linea in texto.splitlines()]
+		completar_lineas(nivel)
+		return nivel
+
+	def nivel(self, indice):
+		"""Devuelve el nivel (de estado.Nivel) de la posición recibida."""
+		return estado.desde_grilla(self[indice]).nivel
+
+	def cargar_indice(self):
+		"""
+		Devuelve el índice del paquete: un arreglo con el byte de inicio y de fin
+		de cada nivel. Lo lee del archivo de índice si sigue siendo válido; si no,
+		lo construye recorriendo el paquete e intenta guardarlo.
+		"""
+		datos = os.stat(self.ruta)
+		encabezado = [VERSION_INDICE, datos.st_mtime_ns, datos.st_size]
+		ruta_indice = self.ruta + EXTENSION_INDICE
+		try:
+			with open(ruta_indice, "rb") as archivo:
+				indice = array.array("q")
+				indice.frombytes(archivo.read())
+			if indice[:3].tolist() == encabezado:
+				return indice[3:]
+		except (OSError, ValueError):
+			pass
+		posiciones = indexar(self.mapa)
+		try:
+			temporal = ruta_indice + ".tmp"
+			with open(temporal, "wb") as archivo:
+				(array.array("q", encabezado) + posiciones).tofile(archivo)
+			os.replace(temporal, ruta_indice)
+		except OSError:
+			pass
+		return posiciones
+
+	def cerrar(self):
+		"""Cierra el paquete."""
+		if self.mapa is not None:
+			self.mapa.close()
+			self.mapa = None
+
+def indexar(mapa):
+	"""
+	Recibe el contenido de un paquete de niveles (bytes o un mmap, o None si
+	está vacío). Devuelve un arreglo con el byte de inicio y de fin de cada nivel.
+	"""
+	posiciones = array.array("q")
+	if mapa is None:
+		return posiciones
+	inicio = None
+	actual = 0
+	largo = len(mapa)
+	while actual < largo:
+		fin_linea = mapa.find(b"\n", actual)
+		siguiente = largo if fin_linea == -1 else fin_linea + 1
+		linea = mapa[actual:siguiente].rstrip()
+		if es_fila_de_nivel(linea):
+			if inicio is None:
+				inicio = actual
+		elif inicio is not None:
+			posiciones.extend((inicio, actual))
+			inicio = None
+		actual = siguiente
+	if inicio is not None:
+		posiciones.extend((inicio, largo))
+	return posiciones
+
+def es_fila_de_nivel(linea):
+	"""Recibe una línea en bytes y devuelve True si es una fila de un nivel."""
+	return b"#" in linea and CELDAS_DE_NIVEL.issuperset(linea)
+
+def copiar_niveles(ruta_archivo):
+	"""
+	Recibe la ruta de un archivo que contiene muchos niveles. Devuelve una lista con 
+	todos los niveles que se encuentran en el archivo.
+	"""
+	paquete = PaqueteNiveles(ruta_archivo)
+	niveles = [paquete[i] for i in range(len(paquete))]
+	paquete.cerrar()
+	return niveles
+
+def copiar_teclas(ruta_archivo):
+	"""
+	Recibe la ruta de un archivo que contiene la referencia a las teclas. Devuelve un
+	diccionario en el que las claves son las teclas y sus valores correspondientes son
+	las acciones.
+	"""
+	teclas = {}
+	with open(ruta_archivo) as archivo:
+		for linea in archivo:
+			if linea == SALTO_DE_LINEA:
+				continue
+			tecla, referencia = linea.rstrip().split("=")
+			teclas[tecla.rstrip()] = referencia.lstrip(" ")
+	return teclas
+
+def completar_lineas(grilla):
+	"""
+	Recibe una grilla en forma de lista. Si las filas de la grilla no tienen la
+	misma cantidad de columnas, modifica la grilla para que ahora todas las filas
+	tengan la misma longitud.  
+	"""
+	ancho = 0
+	for fila in grilla:
+		if len(fila) > ancho:
+			ancho = len(fila)
+	for i, fila in enumerate(grilla):
+		incompletas = ancho - len(fila)
+		grilla[i] = fila + (" " * incompletas)
@@ -1,30 +1,297 @@
-import soko
+import heapq
+import multiprocessing
+import os
+import threading
+import time
+import estado
+import heuristica
+import bloqueos
+import transposicion
+from instrumentacion import Estadisticas
 from pila import Pila
 
-def buscar_solucion(estado_inicial):
+LIMITE_NODOS = 200000
+MOVIMIENTOS = "MOVIMIENTOS"
+EMPUJES = "EMPUJES"
+BIDIRECCIONAL = "BIDIRECCIONAL"
+PARALELO = "PARALELO"
+ESTRATEGIAS = (
+	(BIDIRECCIONAL, 1),
+	(EMPUJES, 1),
+	(BIDIRECCIONAL, 2),
+	(EMPUJES, 2),
+	(BIDIRECCIONAL, 3),
+	(EMPUJES, 3),
+	(BIDIRECCIONAL, 5),
+	(EMPUJES, 5),
+	(MOVIMIENTOS, 1),
+	(BIDIRECCIONAL, 1.5),
+	(EMPUJES, 1.5),
+	(BIDIRECCIONAL, 8),
+	(EMPUJES, 8),
+	(MOVIMIENTOS, 2),
+	(BIDIRECCIONAL, 13),
+	(EMPUJES, 13),
+)
+ESPERA_PARALELO = 0.05
+CAMPOS_PROGRESO = 5
+
+def buscar_solucion(estado_inicial, limite_nodos=LIMITE_NODOS, modo=EMPUJES, verificar=False, capacidad=transposicion.CAPACIDAD, cancelar=None, estadisticas=None, semilla=None, perfil=None, peso=1, procesos=None):
 	"""
 	Recibe el estado del juego y busca una solución al mismo.
-	Si encuentra una solución devuelve True y una lista con los
-	movimientos de dicha solución. Caso contrario, devuelve False
-	y None.
+	Si encuentra una solución devuelve True y una pila con los
+	movimientos de dicha solución (el primer movimiento en el tope). Si
+	recorre todos los estados alcanzables sin encontrarla, el nivel no tiene
+	solución desde ese estado y devuelve False y None. Si se abandona antes
+	(por expandir más de 'limite_nodos' estados, por cancelarse o por
+	descartar estados al llenarse la memoria) no se sabe si hay solución y
+	devuelve None y None. El modo indica si cada paso de la
+	búsqueda es un movimiento del jugador (MOVIMIENTOS) o un empuje de una
+	caja (EMPUJES); en el modo BIDIRECCIONAL se busca a la vez empujando
+	desde el estado inicial y tirando de las cajas desde los objetivos, y en
+	el modo PARALELO se corren a la vez varias estrategias (ver
+	buscar_en_paralelo) en 'procesos' procesos. Con un 'peso' mayor que 1
+	la heurística pesa más que la profundidad (ver a_estrella). Los estados
+	alcanzados se guardan por su firma Zobrist en una tabla de transposición
+	de a lo sumo 'capacidad' estados, y la frontera tampoco pasa de esa
+	cantidad (ver recortar_frontera); en el modo BIDIRECCIONAL cada sentido
+	tiene su tabla y su frontera, así que cada uno recibe la mitad de la
+	capacidad. Si 'verificar' es True además se guarda cada estado completo
+	para que dos estados con la misma firma no se confundan. 'cancelar'
+	puede ser un threading.Event: si se activa, la búsqueda se abandona. Si
+	se reciben 'estadisticas' (de instrumentacion.Estadisticas), la búsqueda
+	lleva en ellas sus contadores y avisa su progreso. Si se recibe una Semilla de una
+	búsqueda anterior del mismo nivel, se reutilizan sus datos precalculados.
+	Si se recibe un cProfile.Profile en 'perfil', se lo activa sólo mientras
+	dura la búsqueda; en el modo PARALELO, que busca en otros procesos, no se
+	puede perfilar y se levanta ValueError.
+	"""
+	if semilla is None:
+		semilla = Semilla()
+	if estadisticas is None:
+		estadisticas = Estadisticas()
+	if modo == PARALELO:
+		if perfil is not None:
+			raise ValueError("El modo PARALELO busca en otros procesos, así que no se puede perfilar con un cProfile.Profile")
+		resultado = buscar_en_paralelo(estado_inicial, limite_nodos, capacidad, cancelar, estadisticas, procesos, semilla, verificar, peso)
+		estadisticas.terminar()
+		return resultado
+	inicial = semilla.estado_inicial(estado_inicial)
+	if modo == BIDIRECCIONAL:
+		capacidad = max(1, capacidad // 2)
+	tabla = transposicion.TablaTransposicion(capacidad, verificar)
+	if perfil is not None:
+		perfil.enable()
+	try:
+		if modo == MOVIMIENTOS:
+			return a_estrella(inicial, limite_nodos, tabla, cancelar, estadisticas, semilla.cotas, peso)
+		if modo == BIDIRECCIONAL:
+			return a_estrella_bidireccional(inicial, limite_nodos, tabla, cancelar, estadisticas, semilla.cotas, peso)
+		return a_estrella_empujes(inicial, limite_nodos, tabla, cancelar, estadisticas, semilla.cotas, peso)
+	finally:
+		if perfil is not None:
+			perfil.disable()
+		estadisticas.terminar()
+
+def buscar_en_paralelo(grilla, limite_nodos, capacidad, cancelar=None, estadisticas=None, procesos=None, semilla=None, verificar=False, peso=1):
+	"""
+	Recibe una grilla, los límites de la búsqueda, un threading.Event opcional
+	que la cancela, estadísticas opcionales, la cantidad de procesos (por
+	defecto, uno por núcleo), una Semilla opcional, si se verifican las
+	colisiones de firmas y el peso base de la heurística. Corre en paralelo,
+	cada una en un proceso y con su parte de la capacidad, las primeras
+	'procesos' estrategias de ESTRATEGIAS (un modo y un peso, que se
+	multiplica por el peso base) y devuelve el resultado de la primera que
+	encuentra una solución, abandonando las demás. Si alguna demuestra que no
+	hay solución devuelve False y None; si ninguna llega a saberlo, o si se
+	cancela la búsqueda, devuelve None y None. Mientras espera suma en
+	las estadísticas los contadores de todos los procesos y avisa el progreso.
+	Los procesos se crean con 'spawn' para que sea seguro usarlo desde un
+	programa con varios hilos, como el juego, y se reutilizan entre búsquedas
+	(ver cerrar_procesos); cada proceso guarda su propia semilla, así que las
+	búsquedas siguientes del mismo nivel aprovechan lo que ya calculó. Sólo
+	corre una búsqueda en paralelo por vez: empezar otra abandona la anterior.
+	"""
+	if procesos is None:
+		procesos = os.cpu_count() or 1
+	if semilla is None:
+		semilla = Semilla()
+	estrategias = ESTRATEGIAS[:max(1, min(procesos, len(ESTRATEGIAS)))]
+	capacidad_por_proceso = max(1, capacidad // len(estrategias))
+	with _cerrojo_grupo:
+		grupo = _obtener_grupo(len(estrategias))
+		grupo.vigente.value += 1
+		numero = grupo.vigente.value
+		for i in range(len(grupo.progreso)):
+			grupo.progreso[i] = 0
+		pendientes = [grupo.procesos.apply_async(resolver_con_estrategia, (grilla, modo, peso * peso_estrategia, limite_nodos, capacidad_por_proceso, verificar, semilla, indice, numero)) for indice, (modo, peso_estrategia) in enumerate(estrategias)]
+	try:
+		while pendientes and not _cancelada(cancelar):
+			for pendiente in [pendiente for pendiente in pendientes if pendiente.ready()]:
+				pendientes.remove(pendiente)
+				hay_solucion, direcciones = pendiente.get()
+				if hay_solucion:
+					acciones = Pila()
+					for direccion in reversed(direcciones):
+						concatenar(direccion, acciones)
+					return True, acciones
+				if hay_solucion is False:
+					return False, None
+			_sumar_progreso(estadisticas, grupo.progreso, len(estrategias))
+			time.sleep(ESPERA_PARALELO)
+		return None, None
+	finally:
+		_sumar_progreso(estadisticas, grupo.progreso, len(estrategias))
+		with _cerrojo_grupo:
+			if grupo.vigente.value == numero:
+				grupo.vigente.value += 1
+
+def cerrar_procesos():
+	"""Termina los procesos que buscar_en_paralelo mantiene para las búsquedas siguientes."""
+	global _grupo
+	with _cerrojo_grupo:
+		if _grupo is not None:
+			_grupo.procesos.terminate()
+			_grupo.procesos.join()
+			_grupo = None
+
+class _Grupo:
+	"""
+	Representa los procesos de buscar_en_paralelo y la memoria que comparten
+	con el proceso principal: el número de la búsqueda vigente (los procesos
+	abandonan las búsquedas que ya no lo son) y los contadores de cada
+	estrategia, CAMPOS_PROGRESO enteros por estrategia.
+	"""
+
+	def __init__(self, cantidad):
+		contexto = multiprocessing.get_context("spawn")
+		self.cantidad = cantidad
+		self.vigente = contexto.RawValue("q", 0)
+		self.progreso = contexto.RawArray("q", cantidad * CAMPOS_PROGRESO)
+		self.procesos = contexto.Pool(cantidad, _iniciar_proceso, (self.vigente, self.progreso))
+
+def _obtener_grupo(cantidad):
+	"""Devuelve el grupo de 'cantidad' procesos, creándolo si no existe o si es de otro tamaño."""
+	global _grupo
+	if _grupo is not None and _grupo.cantidad != cantidad:
+		_grupo.procesos.terminate()
+		_grupo.procesos.join()
+		_grupo = None
+	if _grupo is None:
+		_grupo = _Grupo(cantidad)
+	return _grupo
+
+def _sumar_progreso(estadisticas, progreso, cantidad):
+	"""Carga en las estadísticas la suma de los contadores de las 'cantidad' estrategias."""
+	if estadisticas is None:
+		return
+	totales = [0] * CAMPOS_PROGRESO
+	for i in range(cantidad):
+		contadores = progreso[i * CAMPOS_PROGRESO:(i + 1) * CAMPOS_PROGRESO]
+		for campo in range(CAMPOS_PROGRESO - 2):
+			totales[campo] += contadores[campo]
+		for campo in range(CAMPOS_PROGRESO - 2, CAMPOS_PROGRESO):
+			totales[campo] = max(totales[campo], contadores[campo])
+	estadisticas.actualizar(*totales)
+
+def _iniciar_proceso(vigente, progreso):
+	"""Guarda en un proceso de buscar_en_paralelo la memoria que comparte con el proceso principal."""
+	global _vigente_proceso, _progreso_proceso
+	_vigente_proceso = vigente
+	_progreso_proceso = progreso
+
+def resolver_con_estrategia(grilla, modo, peso, limite_nodos, capacidad, verificar, semilla, indice, numero):
 	"""
-	visitados = set()
-	return backtrack(estado_inicial, visitados)
+	Busca la solución de la grilla con el modo y el peso recibidos. Se
+	ejecuta en un proceso de buscar_en_paralelo, como la estrategia 'indice'
+	de la búsqueda 'numero', y la abandona si deja de ser la vigente. Va
+	dejando sus contadores en la memoria compartida. Devuelve si encontró una
+	solución (True, False o None, como buscar_solucion) y la lista de sus
+	direcciones (o None).
+	"""
+	vigencia = _Vigencia(numero)
+	estadisticas = Estadisticas(progreso=lambda estadisticas: _informar(estadisticas, indice, vigencia))
+	hay_solucion, movimientos = buscar_solucion(grilla, limite_nodos, modo=modo, verificar=verificar, capacidad=capacidad, cancelar=vigencia, estadisticas=estadisticas, semilla=_semilla_del_proceso(semilla), peso=peso)
+	_informar(estadisticas, indice, vigencia)
+	direcciones = None
+	if hay_solucion:
+		direcciones = []
+		while not movimientos.esta_vacia():
+			direcciones.append(movimientos.desapilar())
+	return hay_solucion, direcciones
 
-def agregar(visitados, estado):
+class _Vigencia:
 	"""
-	Recibe un diccionario con los estados visitados y el estado actual.
-	Devuelve ese mismo diccionario con el estado agregado.
+	Hace las veces de threading.Event para cancelar la búsqueda de un proceso
+	de buscar_en_paralelo: está activo cuando la búsqueda con el número
+	recibido dejó de ser la vigente.
 	"""
-	visitados.add(estado)
 
-def pertenece(visitados, nuevo_estado):
+	def __init__(self, numero):
+		self.numero = numero
+
+	def is_set(self):
+		return _vigente_proceso.value != self.numero
+
+def _informar(estadisticas, indice, vigencia):
+	"""Deja los contadores de la estrategia 'indice' en la memoria compartida, si su búsqueda sigue vigente."""
+	if vigencia.is_set():
+		return
+	inicio = indice * CAMPOS_PROGRESO
+	_progreso_proceso[inicio:inicio + CAMPOS_PROGRESO] = [estadisticas.expandidos, estadisticas.podados, estadisticas.duplicados, estadisticas.profundidad_maxima, estadisticas.frontera_maxima]
+
+def _semilla_del_proceso(semilla):
+	"""
+	Devuelve la semilla que usa este proceso: la que ya tenía si es del mismo
+	nivel que la recibida (sumándole las cotas de ésta) y si no la recibida.
 	"""
-	Recibe un diccionario con los estados visitados y el estado actual.
-	Si el estado actual se encuentra dentro de los visitados devuelve True.
-	Caso contrario, False.
+	global _semilla_proceso
+	if semilla.nivel is None or (_semilla_proceso.nivel is not None and _mismo_nivel(_semilla_proceso.nivel, semilla.nivel)):
+		_semilla_proceso.cotas.update(semilla.cotas)
+	else:
+		_semilla_proceso = semilla
+	return _semilla_proceso
+
+class Semilla:
 	"""
-	return nuevo_estado in visitados
+	Guarda los datos de una búsqueda que sirven para las siguientes búsquedas
+	del mismo nivel: el nivel, con las casillas muertas, las tablas Zobrist y
+	demás datos ya precalculados, y las cotas de la heurística ya calculadas
+	para cada conjunto de cajas. Las profundidades de la tabla de transposición
+	no se reutilizan porque son relativas al estado inicial de cada búsqueda.
+	"""
+
+	def __init__(self, nivel=None):
+		"""
+		Crea una semilla vacía o, si se recibe, con un nivel (de estado.Nivel)
+		cuyos datos ya están precalculados.
+		"""
+		self.nivel = nivel
+		self.cotas = {}
+
+	def estado_inicial(self, grilla):
+		"""
+		Recibe una grilla y devuelve su estado (de estado.Estado). Si la grilla
+		es del mismo nivel que la búsqueda anterior, el estado usa ese nivel; si
+		no, la semilla se reinicia con el nivel nuevo.
+		"""
+		inicial = estado.desde_grilla(grilla)
+		nivel = inicial.nivel
+		if self.nivel is not None and _mismo_nivel(self.nivel, nivel):
+			return estado.Estado(self.nivel, inicial.jugador, inicial.cajas)
+		self.nivel = nivel
+		self.cotas = {}
+		return inicial
+
+_grupo = None
+_cerrojo_grupo = threading.Lock()
+_vigente_proceso = None
+_progreso_proceso = None
+_semilla_proceso = Semilla()
+
+def _mismo_nivel(nivel, otro):
+	"""Devuelve True si los dos niveles tienen las mismas dimensiones, paredes y objetivos."""
+	return (nivel.ancho, nivel.alto, nivel.paredes, nivel.objetivos) == (otro.ancho, otro.alto, otro.paredes, otro.objetivos)
 
 def concatenar(direccion, acciones):
 	"""
@@ -35,27 +302,446 @@ def concatenar(direccion, acciones):
 	acciones.apilar(direccion)
 	return acciones
 
-def backtrack(estado, visitados):
-	"""
-	Recibe el estado actual y una lista de los estados visitados.
-	Si en dicho estado el juego está ganado, devuelve True y una lista
-	vacía. Caso contrario, analiza las posibles direcciones del jugador
-	llamando recursivamente a esta función en cada una de las direcciones.
-	Si en alguna de las direcciones se encuentra una solución, devuelve True
-	y una lista de las acciones realizadas. En caso de que el juego no se pueda 
-	solucionar devuelve False y None.
-	"""
-	direcciones = ((0, -1), (0, 1), (1, 0), (-1, 0))
-	agregar(visitados, str(estado))
-	if soko.juego_ganado(estado):
-		pila = Pila()
-		return True, pila
-	for direccion in direcciones:
-		nuevo_estado = soko.mover(estado, direccion)
-		if pertenece(visitados, str(nuevo_estado)):
+def reconstruir(rastro):
+	"""
+	Recibe el rastro del estado ganador: una tupla con el rastro de su padre
+	y la dirección con la que se llegó a él (None para el estado inicial).
+	Devuelve una pila con los movimientos que llevan desde el estado inicial
+	hasta el ganador, con el primer movimiento en el tope.
+	"""
+	acciones = Pila()
+	while rastro is not None:
+		rastro, direccion = rastro
+		concatenar(direccion, acciones)
+	return acciones
+
+def a_estrella(actual, limite_nodos, tabla, cancelar=None, estadisticas=None, cotas=None, peso=1):
+	"""
+	Recibe un estado (de estado.Estado), la cantidad máxima de estados a
+	expandir, una tabla de transposición, un threading.Event opcional que
+	cancela la búsqueda, estadísticas opcionales (de instrumentacion), un
+	diccionario opcional con las cotas ya calculadas y el peso de la
+	heurística. Busca de forma iterativa la solución más corta con A*,
+	usando como heurística el emparejamiento de costo mínimo entre cajas y
+	objetivos y descartando los empujes que dejan una caja en una casilla
+	muerta o congelada antes de que entren a la tabla.
+	Cada estado de la frontera guarda su rastro hasta el inicial, así que los
+	estados que la tabla desaloja no impiden reconstruir la solución. Con un
+	peso mayor que 1 la heurística pesa más que la profundidad: la búsqueda
+	suele terminar antes, pero la solución puede no ser la más corta.
+	Devuelve True y la pila de movimientos si encuentra una solución, False
+	y None si demuestra que no la hay y None y None si se abandona la
+	búsqueda o si se descartaron estados de la frontera (ver
+	buscar_solucion). El estado recibido se usa como estado de trabajo y se
+	modifica.
+	"""
+	nivel = actual.nivel
+	muertas = bloqueos.casillas_muertas(nivel)
+	if cotas is None:
+		cotas = {}
+	if estadisticas is None:
+		estadisticas = Estadisticas()
+	clave = tabla.clave(actual.firma, actual.clave())
+	tabla.registrar(clave, 0)
+	contador = 0
+	recortada = False
+	frontera = [(_cota(nivel, cotas, actual.cajas, tabla), 0, contador, clave, actual.jugador, actual.cajas, actual.firma, None)]
+	while frontera:
+		_, menos_g, _, clave, jugador, cajas, firma, rastro = heapq.heappop(frontera)
+		g = -menos_g
+		if tabla.profundidad(clave) < g:
+			estadisticas.duplicados += 1
 			continue
-		solución_encontrada, acciones = backtrack(nuevo_estado, visitados)
-		if solución_encontrada:
-			return True, concatenar(direccion, acciones)
+		actual.jugador, actual.cajas, actual.firma = jugador, cajas, firma
+		if actual.juego_ganado():
+			return True, reconstruir(rastro)
+		estadisticas.expandir(g, len(frontera))
+		if estadisticas.expandidos > limite_nodos or _cancelada(cancelar):
+			return None, None
+		for direccion in estado.DIRECCIONES:
+			empujo = actual.mover(direccion)
+			if empujo is None:
+				continue
+			if empujo and _sin_salida(nivel, muertas, actual.cajas, actual.jugador + nivel.desplazamiento(direccion)):
+				estadisticas.podados += 1
+				actual.deshacer(direccion, empujo)
+				continue
+			nueva = tabla.clave(actual.firma, actual.clave())
+			if g + 1 >= tabla.profundidad(nueva):
+				estadisticas.duplicados += 1
+			else:
+				h = _cota(nivel, cotas, actual.cajas, tabla)
+				if h == heuristica.INFINITO:
+					estadisticas.podados += 1
+				else:
+					tabla.registrar(nueva, g + 1)
+					contador += 1
+					heapq.heappush(frontera, (g + 1 + peso * h, -(g + 1), contador, nueva, actual.jugador, actual.cajas, actual.firma, (rastro, direccion)))
+			actual.deshacer(direccion, empujo)
+		recortada = recortar_frontera(frontera, tabla.capacidad) or recortada
+	return (None if recortada else False), None
+
+def recortar_frontera(frontera, capacidad):
+	"""
+	Recibe una frontera (una lista con forma de heap) y la capacidad de la
+	tabla de transposición. Si la frontera tiene más estados que la capacidad,
+	descarta la fracción FRACCION_DESALOJO de la tabla con mayor costo
+	estimado, junto con sus rastros, para que la frontera tampoco crezca más
+	allá de la capacidad. Devuelve True si descartó estados.
+	"""
+	if len(frontera) <= capacidad:
+		return False
+	frontera[:] = heapq.nsmallest(max(1, int(len(frontera) * (1 - transposicion.FRACCION_DESALOJO))), frontera)
+	return True
+
+def _cancelada(cancelar):
+	"""Devuelve True si se pidió cancelar la búsqueda."""
+	return cancelar is not None and cancelar.is_set()
+
+def _cota(nivel, cotas, cajas, tabla):
+	"""
+	Devuelve la heurística para la máscara de cajas recibida, guardándola en
+	'cotas'. Si 'cotas' llega a la capacidad de la tabla se vacía.
+	"""
+	if cajas not in cotas:
+		if len(cotas) >= tabla.capacidad:
+			cotas.clear()
+		cotas[cajas] = heuristica.cota_inferior(nivel, cajas)
+	return cotas[cajas]
+
+def _sin_salida(nivel, muertas, cajas, caja):
+	"""
+	Recibe la máscara de cajas luego de un empuje y la celda de la caja
+	empujada. Devuelve True si la caja quedó en una casilla muerta o en un
+	bloqueo.
+	"""
+	return (muertas >> caja) & 1 == 1 or bloqueos.hay_bloqueo(nivel, cajas, caja)
+
+def alcanzables(nivel, jugador, cajas):
+	"""
+	Recibe un nivel, la celda del jugador y la máscara de cajas. Devuelve un
+	diccionario cuyas claves son las celdas a las que el jugador puede
+	caminar sin empujar cajas y cuyos valores son la celda anterior y la
+	dirección con la que se llega a ellas (None para la celda de partida).
+	"""
+	ocupadas = nivel.paredes | cajas
+	padres = {jugador: None}
+	pendientes = [jugador]
+	while pendientes:
+		celda = pendientes.pop()
+		for direccion in estado.DIRECCIONES:
+			vecina = celda + nivel.desplazamiento(direccion)
+			if (ocupadas >> vecina) & 1 or vecina in padres:
+				continue
+			padres[vecina] = (celda, direccion)
+			pendientes.append(vecina)
+	return padres
+
+def camino(padres, destino):
+	"""
+	Recibe el resultado de alcanzables y una celda alcanzable. Devuelve la
+	lista de direcciones que llevan al jugador hasta esa celda.
+	"""
+	direcciones = []
+	while padres[destino] is not None:
+		destino, direccion = padres[destino]
+		direcciones.append(direccion)
+	direcciones.reverse()
+	return direcciones
+
+def a_estrella_empujes(actual, limite_nodos, tabla, cancelar=None, estadisticas=None, cotas=None, peso=1):
+	"""
+	Recibe un estado (de estado.Estado), la cantidad máxima de estados a
+	expandir, una tabla de transposición, un threading.Event opcional que
+	cancela la búsqueda, estadísticas opcionales (de instrumentacion), un
+	diccionario opcional con las cotas ya calculadas y el peso de la
+	heurística (ver a_estrella). Busca con A* la solución con menos
+	empujes: cada paso de la búsqueda es un empuje y el estado se identifica
+	por las cajas y por la celda alcanzable más arriba a la izquierda, así
+	que todas las posiciones del jugador entre dos empujes cuentan como un
+	único estado. La firma de las cajas se actualiza
+	en cada empuje en lugar de recalcularse.
+	Devuelve True y la pila de movimientos (caminatas incluidas) si
+	encuentra una solución. Caso contrario devuelve False o None y None,
+	como a_estrella.
+	"""
+	nivel = actual.nivel
+	muertas = bloqueos.casillas_muertas(nivel)
+	claves_cajas, claves_jugador = estado.zobrist(nivel)
+	if cotas is None:
+		cotas = {}
+	if estadisticas is None:
+		estadisticas = Estadisticas()
+	normalizada = min(alcanzables(nivel, actual.jugador, actual.cajas))
+	firma = estado.firma_cajas(nivel, actual.cajas)
+	clave = tabla.clave(firma ^ claves_jugador[normalizada], (normalizada, actual.cajas))
+	tabla.registrar(clave, 0)
+	contador = 0
+	recortada = False
+	frontera = [(_cota(nivel, cotas, actual.cajas, tabla), 0, contador, clave, normalizada, actual.cajas, firma, None)]
+	while frontera:
+		_, menos_g, _, clave, normalizada, cajas, firma, rastro = heapq.heappop(frontera)
+		g = -menos_g
+		if tabla.profundidad(clave) < g:
+			estadisticas.duplicados += 1
+			continue
+		if nivel.objetivos & ~cajas == 0:
+			return True, expandir_empujes(nivel, rastro, actual.jugador)
+		estadisticas.expandir(g, len(frontera))
+		if estadisticas.expandidos > limite_nodos or _cancelada(cancelar):
+			return None, None
+		for jugador, celda, direccion, caja, destino, nuevas in sucesores_empuje(nivel, muertas, normalizada, cajas, estadisticas):
+			nueva_firma = firma ^ claves_cajas[caja] ^ claves_cajas[destino]
+			nueva_normalizada = min(alcanzables(nivel, jugador, nuevas))
+			nueva = tabla.clave(nueva_firma ^ claves_jugador[nueva_normalizada], (nueva_normalizada, nuevas))
+			if g + 1 >= tabla.profundidad(nueva):
+				estadisticas.duplicados += 1
+				continue
+			h = _cota(nivel, cotas, nuevas, tabla)
+			if h == heuristica.INFINITO:
+				estadisticas.podados += 1
+			else:
+				tabla.registrar(nueva, g + 1)
+				contador += 1
+				heapq.heappush(frontera, (g + 1 + peso * h, -(g + 1), contador, nueva, nueva_normalizada, nuevas, nueva_firma, (rastro, cajas, celda, direccion)))
+		recortada = recortar_frontera(frontera, tabla.capacidad) or recortada
+	return (None if recortada else False), None
+
+def sucesores_empuje(nivel, muertas, normalizada, cajas, estadisticas):
+	"""
+	Recibe el nivel, la máscara de casillas muertas, la celda normalizada del
+	jugador, la máscara de cajas y las estadísticas de la búsqueda. Genera los
+	empujes posibles que no dejan una caja sin salida (los demás se cuentan
+	como podados), cada uno como una tupla con la celda en la que queda el
+	jugador, la celda desde la que empuja, la dirección, la celda de la caja,
+	la celda a la que va y la nueva máscara de cajas.
+	"""
+	for celda in alcanzables(nivel, normalizada, cajas):
+		for direccion in estado.DIRECCIONES:
+			d = nivel.desplazamiento(direccion)
+			caja = celda + d
+			destino = caja + d
+			if not (cajas >> caja) & 1 or nivel.hay_pared(destino) or (cajas >> destino) & 1:
+				continue
+			nuevas = cajas ^ (1 << caja) ^ (1 << destino)
+			if _sin_salida(nivel, muertas, nuevas, destino):
+				estadisticas.podados += 1
+				continue
+			yield caja, celda, direccion, caja, destino, nuevas
+
+def sucesores_tiron(nivel, normalizada, cajas):
+	"""
+	Recibe el nivel, la celda normalizada del jugador y la máscara de cajas.
+	Genera los tirones posibles: el jugador, parado junto a una caja, da un
+	paso hacia atrás arrastrándola. Cada tirón se genera como una tupla con
+	la celda en la que queda el jugador, la celda desde la que se hace el
+	empuje equivalente (que es esa misma celda), la dirección de ese empuje,
+	la celda de la caja, la celda a la que va y la nueva máscara de cajas.
+	"""
+	ocupadas = nivel.paredes | cajas
+	for celda in alcanzables(nivel, normalizada, cajas):
+		for direccion in estado.DIRECCIONES:
+			d = nivel.desplazamiento(direccion)
+			caja = celda + d
+			jugador = celda - d
+			if not (cajas >> caja) & 1 or (ocupadas >> jugador) & 1:
+				continue
+			yield jugador, jugador, direccion, caja, celda, cajas ^ (1 << caja) ^ (1 << celda)
+
+class _Lado:
+	"""
+	Representa uno de los dos sentidos de la búsqueda bidireccional: su
+	frontera, su tabla de transposición, el índice de los estados que alcanzó
+	(por firma, con su clave en la tabla, el estado y su rastro) y la tabla
+	de distancias de su heurística, con las cotas ya calculadas. Cuando la
+	tabla desaloja estados, también se olvidan del índice, así que éste
+	nunca supera la capacidad de la tabla.
+	"""
+
+	def __init__(self, tabla, distancias, cotas, peso):
+		self.tabla = tabla
+		self.peso = peso
+		self.distancias = distancias
+		self.cotas = cotas
+		self.frontera = []
+		self.alcanzados = {}
+		self.desalojados = tabla.desalojados
+		self.recortada = False
+		self.contador = 0
+
+	def cota(self, cajas):
+		"""Devuelve la heurística de este sentido para la máscara de cajas recibida."""
+		if cajas not in self.cotas:
+			if len(self.cotas) >= self.tabla.capacidad:
+				self.cotas.clear()
+			self.cotas[cajas] = heuristica.cota_con_tabla(self.distancias, cajas)
+		return self.cotas[cajas]
+
+	def agregar(self, clave, firma_completa, g, normalizada, cajas, firma, rastro):
+		"""
+		Agrega un estado a la frontera con la profundidad recibida. Devuelve
+		False si la heurística indica que desde él no se llega al otro extremo.
+		"""
+		h = self.cota(cajas)
+		if h == heuristica.INFINITO:
+			return False
+		self.tabla.registrar(clave, g)
+		self.alcanzados[firma_completa] = (clave, normalizada, cajas, rastro)
+		if self.tabla.desalojados != self.desalojados:
+			self.desalojados = self.tabla.desalojados
+			self.alcanzados = {firma: alcanzado for firma, alcanzado in self.alcanzados.items() if alcanzado[0] in self.tabla}
+		self.contador += 1
+		heapq.heappush(self.frontera, (g + self.peso * h, -g, self.contador, clave, normalizada, cajas, firma, rastro))
+		self.recortada = recortar_frontera(self.frontera, self.tabla.capacidad) or self.recortada
+		return True
+
+	def olvido(self):
+		"""Devuelve True si este sentido desalojó estados de su tabla o descartó estados de su frontera."""
+		return self.tabla.desalojados > 0 or self.recortada
+
+	def alcanzo(self, firma_completa, normalizada, cajas):
+		"""Devuelve True si este sentido ya alcanzó el estado recibido."""
+		alcanzado = self.alcanzados.get(firma_completa)
+		return alcanzado is not None and alcanzado[1:3] == (normalizada, cajas)
+
+	def rastro(self, firma_completa):
+		"""Devuelve el rastro de un estado que este sentido ya alcanzó."""
+		return self.alcanzados[firma_completa][3]
+
+def a_estrella_bidireccional(actual, limite_nodos, tabla, cancelar=None, estadisticas=None, cotas=None, peso=1):
+	"""
+	Recibe los mismos parámetros que a_estrella_empujes. Busca una solución con
+	dos búsquedas A* por empujes que avanzan por turnos, expandiendo siempre la
+	de frontera más chica: una empuja las cajas desde el estado inicial hacia
+	los objetivos y la otra tira de ellas desde los objetivos hacia sus
+	posiciones iniciales. Termina en cuanto una de las dos alcanza un estado
+	que la otra ya alcanzó, así que la solución no es necesariamente la de
+	menos empujes. Si hay más objetivos que cajas no se sabe de qué estado
+	partir hacia atrás, y la búsqueda es la de a_estrella_empujes.
+	Devuelve True y la pila de movimientos si encuentra una solución. Si uno
+	de los dos sentidos se queda sin estados devuelve False y None, salvo
+	que alguno haya olvidado estados (por desalojarlos de la tabla o
+	descartarlos de la frontera), porque entonces pudo no ver un encuentro:
+	en ese caso, y si se abandona la búsqueda, devuelve None y None.
+	"""
+	nivel = actual.nivel
+	if bin(nivel.objetivos).count("1") != bin(actual.cajas).count("1"):
+		return a_estrella_empujes(actual, limite_nodos, tabla, cancelar, estadisticas, cotas, peso)
+	if nivel.objetivos & ~actual.cajas == 0:
+		return True, Pila()
+	muertas = bloqueos.casillas_muertas(nivel)
+	claves_cajas, claves_jugador = estado.zobrist(nivel)
+	if cotas is None:
+		cotas = {}
+	if estadisticas is None:
+		estadisticas = Estadisticas()
+	tabla_atras = transposicion.TablaTransposicion(tabla.capacidad, tabla.exactos is not None)
+	adelante = _Lado(tabla, heuristica.distancias_de_empuje(nivel), cotas, peso)
+	atras = _Lado(tabla_atras, heuristica.distancias_desde(nivel, estado.celdas(actual.cajas)), {}, peso)
+	for lado, jugador, cajas in [(adelante, actual.jugador, actual.cajas)] + [(atras, jugador, nivel.objetivos) for jugador in _inicios_hacia_atras(nivel)]:
+		normalizada = min(alcanzables(nivel, jugador, cajas))
+		firma = estado.firma_cajas(nivel, cajas)
+		firma_completa = firma ^ claves_jugador[normalizada]
+		lado.agregar(lado.tabla.clave(firma_completa, (normalizada, cajas)), firma_completa, 0, normalizada, cajas, firma, None)
+	while adelante.frontera and atras.frontera:
+		lado, otro = (adelante, atras) if len(adelante.frontera) <= len(atras.frontera) else (atras, adelante)
+		_, menos_g, _, clave, normalizada, cajas, firma, rastro = heapq.heappop(lado.frontera)
+		g = -menos_g
+		if lado.tabla.profundidad(clave) < g:
+			estadisticas.duplicados += 1
+			continue
+		estadisticas.expandir(g, len(adelante.frontera) + len(atras.frontera))
+		if estadisticas.expandidos > limite_nodos or _cancelada(cancelar):
+			return None, None
+		if lado is adelante:
+			sucesores = sucesores_empuje(nivel, muertas, normalizada, cajas, estadisticas)
+		else:
+			sucesores = sucesores_tiron(nivel, normalizada, cajas)
+		for jugador, celda, direccion, caja, destino, nuevas in sucesores:
+			nueva_firma = firma ^ claves_cajas[caja] ^ claves_cajas[destino]
+			nueva_normalizada = min(alcanzables(nivel, jugador, nuevas))
+			firma_completa = nueva_firma ^ claves_jugador[nueva_normalizada]
+			nuevo_rastro = (rastro, cajas if lado is adelante else nuevas, celda, direccion)
+			if otro.alcanzo(firma_completa, nueva_normalizada, nuevas):
+				encontrado = otro.rastro(firma_completa)
+				if lado is adelante:
+					return True, unir_rastros(nivel, nuevo_rastro, encontrado, actual.jugador)
+				return True, unir_rastros(nivel, encontrado, nuevo_rastro, actual.jugador)
+			nueva = lado.tabla.clave(firma_completa, (nueva_normalizada, nuevas))
+			if g + 1 >= lado.tabla.profundidad(nueva):
+				estadisticas.duplicados += 1
+				continue
+			if not lado.agregar(nueva, firma_completa, g + 1, nueva_normalizada, nuevas, nueva_firma, nuevo_rastro):
+				estadisticas.podados += 1
+	if adelante.olvido() or atras.olvido():
+		return None, None
 	return False, None
 
+def _inicios_hacia_atras(nivel):
+	"""
+	Devuelve una celda de cada zona en la que puede terminar el jugador con
+	todas las cajas en los objetivos: las zonas libres vecinas a algún objetivo.
+	"""
+	inicios = []
+	vistas = set()
+	for objetivo in estado.celdas(nivel.objetivos):
+		for direccion in estado.DIRECCIONES:
+			celda = bloqueos.vecina(nivel, objetivo, direccion)
+			if celda is None or nivel.hay_pared(celda) or nivel.hay_objetivo(celda) or celda in vistas:
+				continue
+			vistas.update(alcanzables(nivel, celda, nivel.objetivos))
+			inicios.append(celda)
+	return inicios
+
+def recorrer_rastro(rastro):
+	"""
+	Recibe un rastro de la búsqueda por empujes y devuelve la lista de sus
+	empujes (cada uno con las cajas antes del empuje, la celda desde la que
+	se empuja y la dirección), desde el último hasta el primero.
+	"""
+	empujes = []
+	while rastro is not None:
+		rastro, cajas, celda, direccion = rastro
+		empujes.append((cajas, celda, direccion))
+	return empujes
+
+def unir_rastros(nivel, rastro_adelante, rastro_atras, jugador):
+	"""
+	Recibe el nivel, el rastro de la búsqueda hacia adelante y el de la
+	búsqueda hacia atrás hasta un mismo estado, y la celda inicial del
+	jugador. Los empujes del rastro hacia atrás ya están en el orden en que
+	hay que hacerlos desde ese estado. Devuelve la pila con todos los
+	movimientos de la solución.
+	"""
+	empujes = recorrer_rastro(rastro_adelante)
+	empujes.reverse()
+	empujes.extend(recorrer_rastro(rastro_atras))
+	return movimientos_de_empujes(nivel, empujes, jugador)
+
+def expandir_empujes(nivel, rastro, jugador):
+	"""
+	Recibe el nivel, el rastro del estado ganador de la búsqueda por empujes
+	(una tupla con el rastro del padre, las cajas antes del empuje, la celda
+	desde la que se empuja y la dirección) y la celda inicial del jugador.
+	Devuelve la pila de movimientos que incluye las caminatas entre empujes,
+	con el primer movimiento en el tope.
+	"""
+	empujes = recorrer_rastro(rastro)
+	empujes.reverse()
+	return movimientos_de_empujes(nivel, empujes, jugador)
+
+def movimientos_de_empujes(nivel, empujes, jugador):
+	"""
+	Recibe el nivel, la lista de empujes en orden y la celda inicial del
+	jugador. Devuelve la pila de movimientos que incluye las caminatas entre
+	empujes, con el primer movimiento en el tope.
+	"""
+	movimientos = []
+	for cajas, celda, direccion in empujes:
+		movimientos.extend(camino(alcanzables(nivel, jugador, cajas), celda))
+		movimientos.append(direccion)
+		jugador = celda + nivel.desplazamiento(direccion)
+	acciones = Pila()
+	for direccion in reversed(movimientos):
+		concatenar(direccion, acciones)
+	return acciones
@@ -0,0 +1,101 @@
+import estado
+
+def vecina(nivel, i, direccion):
+	"""
+	Devuelve el índice de la celda vecina a i en la dirección recibida,
+	o None si esa celda queda fuera de la grilla.
+	"""
+	c, f = nivel.posicion(i)
+	dx, dy = direccion
+	if not (0 <= c + dx < nivel.ancho and 0 <= f + dy < nivel.alto):
+		return None
+	return i + nivel.desplazamiento(direccion)
+
+def casillas_muertas(nivel):
+	"""
+	Recibe un nivel y devuelve la máscara de celdas libres desde las que una
+	caja nunca puede llegar a un objetivo. Se calcula una sola vez por nivel
+	tirando cajas hacia atrás desde cada objetivo: toda celda a la que no se
+	llega así es una casilla muerta.
+	"""
+	if "muertas" in nivel.datos:
+		return nivel.datos["muertas"]
+	vivas = nivel.objetivos
+	pendientes = estado.celdas(nivel.objetivos)
+	while pendientes:
+		caja = pendientes.pop()
+		for direccion in estado.DIRECCIONES:
+			destino = vecina(nivel, caja, direccion)
+			if destino is None or nivel.hay_pared(destino) or (vivas >> destino) & 1:
+				continue
+			jugador = vecina(nivel, destino, direccion)
+			if jugador is None or nivel.hay_pared(jugador):
+				continue
+			vivas |= 1 << destino
+			pendientes.append(destino)
+	todas = (1 << (nivel.ancho * nivel.alto)) - 1
+	nivel.datos["muertas"] = todas & ~vivas & ~nivel.paredes
+	return nivel.datos["muertas"]
+
+def es_casilla_muerta(nivel, i):
+	"""Devuelve True si una caja en la celda i del nivel nunca puede llegar a un objetivo."""
+	return (casillas_muertas(nivel) >> i) & 1 == 1
+
+def hay_bloqueo(nivel, cajas, caja):
+	"""
+	Recibe un nivel, la máscara de cajas y la celda de la caja que se acaba
+	de empujar. Devuelve True si el empuje dejó un bloqueo: un cuadrado de 2x2
+	de cajas y paredes con alguna caja fuera de un objetivo, o un grupo de
+	cajas congeladas (que no pueden moverse en ninguno de los dos ejes) con
+	alguna fuera de un objetivo. Sólo revisa el entorno de la caja empujada.
+	"""
+	if _hay_cuadrado(nivel, cajas, caja):
+		return True
+	congeladas = []
+	if not _congelada(nivel, cajas, caja, casillas_muertas(nivel), {caja}, congeladas):
+		return False
+	return any(not nivel.hay_objetivo(i) for i in congeladas + [caja])
+
+def _ocupada(nivel, cajas, i):
+	"""Devuelve True si en la celda i hay una pared o una caja."""
+	return nivel.hay_pared(i) or (cajas >> i) & 1 == 1
+
+def _hay_cuadrado(nivel, cajas, caja):
+	"""
+	Devuelve True si alguno de los cuatro cuadrados de 2x2 que contienen a la
+	caja está completamente ocupado y tiene alguna caja fuera de un objetivo.
+	"""
+	ancho = nivel.ancho
+	for dx in (-1, 1):
+		for dy in (-ancho, ancho):
+			cuadrado = (caja, caja + dx, caja + dy, caja + dx + dy)
+			if not all(_ocupada(nivel, cajas, i) for i in cuadrado):
+				continue
+			if any((cajas >> i) & 1 and not nivel.hay_objetivo(i) for i in cuadrado):
+				return True
+	return False
+
+def _congelada(nivel, cajas, caja, muertas, tratadas, congeladas):
+	"""
+	Devuelve True si la caja no puede moverse ni en el eje horizontal ni en el
+	vertical. Las cajas en 'tratadas' se consideran paredes; las cajas vecinas
+	que resultan congeladas se agregan a 'congeladas'.
+	"""
+	for d in (1, nivel.ancho):
+		if not _bloqueada(nivel, cajas, caja, d, muertas, tratadas, congeladas):
+			return False
+	return True
+
+def _bloqueada(nivel, cajas, caja, d, muertas, tratadas, congeladas):
+	"""Devuelve True si la caja no puede moverse en el eje dado por el desplazamiento d."""
+	vecinas = (caja - d, caja + d)
+	for i in vecinas:
+		if nivel.hay_pared(i) or i in tratadas:
+			return True
+	if all((muertas >> i) & 1 for i in vecinas):
+		return True
+	for i in vecinas:
+		if (cajas >> i) & 1 and _congelada(nivel, cajas, i, muertas, tratadas | {i}, congeladas):
+			congeladas.append(i)
+			return True
+	return False
@@ -0,0 +1,80 @@
+import hashlib
+import os
+import sqlite3
+import estado
+
+ARCHIVO_CACHE = "soluciones.db"
+
+class CacheSoluciones:
+	"""
+	Representa un cache persistente de soluciones guardado en una base SQLite.
+	Cada solución se guarda una sola vez, en formato LURD, y cada posición de
+	su recorrido queda indexada por la clave de su grilla, así que cualquier
+	estado intermedio de una solución conocida se responde con una consulta.
+	"""
+
+	def __init__(self, ruta):
+		"""Abre (o crea) el cache guardado en la ruta recibida."""
+		self.conexion = sqlite3.connect(ruta)
+		self.conexion.executescript("""
+			CREATE TABLE IF NOT EXISTS soluciones (
+				id INTEGER PRIMARY KEY,
+				movimientos TEXT NOT NULL
+			);
+			CREATE TABLE IF NOT EXISTS posiciones (
+				clave TEXT PRIMARY KEY,
+				solucion INTEGER NOT NULL REFERENCES soluciones(id),
+				indice INTEGER NOT NULL
+			);
+		""")
+
+	def buscar(self, grilla):
+		"""
+		Recibe una grilla. Si alguna solución guardada pasa por ella, devuelve
+		la lista de direcciones que faltan para ganar. Caso contrario devuelve None.
+		"""
+		fila = self.conexion.execute("""
+			SELECT soluciones.movimientos, posiciones.indice
+			FROM posiciones JOIN soluciones ON soluciones.id = posiciones.solucion
+			WHERE posiciones.clave = ?
+		""", (clave_grilla(grilla),)).fetchone()
+		if fila is None:
+			return None
+		movimientos, indice = fila
+		return estado.desde_lurd(movimientos[indice:])
+
+	def guardar(self, grilla, direcciones):
+		"""
+		Recibe una grilla y la lista de direcciones que la resuelven. Guarda la
+		solución y registra cada posición de su recorrido.
+		"""
+		actual = estado.desde_grilla(grilla)
+		movimientos = estado.a_lurd(actual, direcciones)
+		with self.conexion:
+			cursor = self.conexion.execute("INSERT INTO soluciones (movimientos) VALUES (?)", (movimientos,))
+			posiciones = []
+			for indice, direccion in enumerate(direcciones):
+				posiciones.append((clave_estado(actual), cursor.lastrowid, indice))
+				actual.mover(direccion)
+			self.conexion.executemany("INSERT OR IGNORE INTO posiciones VALUES (?, ?, ?)", posiciones)
+
+	def cerrar(self):
+		"""Cierra el cache."""
+		self.conexion.close()
+
+def clave_estado(actual):
+	"""
+	Devuelve la clave canónica de un estado (de estado.Estado): un hash de sus
+	dimensiones, paredes, objetivos, cajas y jugador.
+	"""
+	nivel = actual.nivel
+	descripcion = f"{nivel.ancho},{nivel.alto},{nivel.paredes:x},{nivel.objetivos:x},{actual.cajas:x},{actual.jugador}"
+	return hashlib.sha1(descripcion.encode()).hexdigest()
+
+def clave_grilla(grilla):
+	"""Devuelve la clave canónica de una grilla."""
+	return clave_estado(estado.desde_grilla(grilla))
+
+def ruta_cache(ruta_niveles):
+	"""Devuelve la ruta del cache que corresponde al archivo de niveles recibido."""
+	return os.path.join(os.path.dirname(ruta_niveles), ARCHIVO_CACHE)
@@ -0,0 +1,123 @@
+import gamelib
+import soko
+
+IMAGEN_PISO = 'img/ground.gif'
+IMAGEN_CAJA = 'img/box.gif'
+IMAGEN_OBJETIVO = 'img/goal.gif'
+IMAGEN_JUGADOR = 'img/player.gif'
+IMAGEN_JUGADOR_EN_OBJETIVO = 'img/player_2.gif'
+IMAGEN_PARED = 'img/wall.gif'
+ETIQUETA_MENSAJE = "mensaje"
+DIMENSION_IMAGENES = 63
+CAPAS = {
+	soko.PARED: (IMAGEN_PISO, IMAGEN_PARED),
+	soko.CAJA: (IMAGEN_PISO, IMAGEN_CAJA),
+	soko.JUGADOR: (IMAGEN_PISO, IMAGEN_JUGADOR),
+	soko.OBJETIVO: (IMAGEN_PISO, IMAGEN_OBJETIVO),
+	soko.OBJETIVO_Y_CAJA: (IMAGEN_PISO, IMAGEN_CAJA, IMAGEN_OBJETIVO),
+	soko.OBJETIVO_Y_JUGADOR: (IMAGEN_PISO, IMAGEN_OBJETIVO, IMAGEN_JUGADOR_EN_OBJETIVO),
+	soko.CELDA_VACIA: (IMAGEN_PISO,),
+}
+
+class Renderizador:
+	"""
+	Dibuja grillas en la ventana en modo retenido. La primera vez arma una
+	imagen ya compuesta para cada uno de los estados posibles de una celda
+	(escalada al tamaño de celda elegido), así que cada celda es un único
+	elemento del canvas; en cada movimiento sólo se cambia la imagen de las
+	celdas que cambiaron, en lugar de borrar y volver a dibujar todo.
+	"""
+
+	def __init__(self, dimension):
+		"""Crea un renderizador que dibuja celdas de 'dimension' pixeles de lado."""
+		self.dimension = dimension
+		self.grilla = None
+		self.mensaje = None
+		self.imagenes = None
+
+	def dibujar(self, grilla, mensaje=None):
+		"""
+		Recibe una grilla y, opcionalmente, un mensaje (una tupla con el texto y
+		las coordenadas de su esquina superior izquierda). Si la grilla es de
+		otro tamaño la dibuja completa; si no, sólo actualiza las celdas que
+		cambiaron desde la última grilla dibujada. Todos los comandos se envían
+		a la ventana como un único cuadro.
+		"""
+		cambios = None
+		if self.grilla is not None:
+			cambios = celdas_cambiadas(self.grilla, grilla)
+		with gamelib.frame():
+			if self.imagenes is None:
+				self.componer_imagenes()
+			if cambios is None:
+				self.dibujar_todo(grilla)
+			else:
+				self.actualizar(grilla, cambios)
+			self.mostrar_mensaje(mensaje)
+			gamelib.draw_end()
+
+	def componer_imagenes(self):
+		"""
+		Compone, para cada estado de una celda, las imágenes de sus capas en una
+		sola imagen del tamaño de la celda.
+		"""
+		self.imagenes = {}
+		escala = None if self.dimension == DIMENSION_IMAGENES else self.dimension
+		for celda, capas in CAPAS.items():
+			nombre = f"celda {self.dimension} {celda}"
+			gamelib.compose_image(nombre, capas, size=escala)
+			self.imagenes[celda] = nombre
+
+	def dibujar_todo(self, grilla):
+		"""Borra la ventana y crea un elemento por cada celda de la grilla."""
+		ancho, largo = soko.dimensiones(grilla)
+		gamelib.resize(self.dimension * ancho, self.dimension * largo)
+		gamelib.draw_begin()
+		self.mensaje = None
+		for f in range(largo):
+			for c in range(ancho):
+				gamelib.draw_image(self.imagenes[grilla[f][c]], *self.coordenadas(c, f), tags=etiqueta_celda(c, f))
+		self.grilla = grilla
+
+	def actualizar(self, grilla, cambios):
+		"""
+		Recibe la nueva grilla y las celdas que cambiaron respecto de la
+		anterior. Cambia la imagen de cada una de esas celdas.
+		"""
+		for c, f in cambios:
+			gamelib.set_items_image(etiqueta_celda(c, f), self.imagenes[grilla[f][c]])
+		self.grilla = grilla
+
+	def mostrar_mensaje(self, mensaje):
+		"""Muestra el mensaje recibido (o ninguno si es None), si no es el que ya se muestra."""
+		if mensaje == self.mensaje:
+			return
+		gamelib.delete_items(ETIQUETA_MENSAJE)
+		if mensaje is not None:
+			texto, x, y = mensaje
+			gamelib.draw_text(texto, x, y, anchor="nw", tags=ETIQUETA_MENSAJE)
+		self.mensaje = mensaje
+
+	def coordenadas(self, c, f):
+		"""Devuelve las coordenadas en pixeles de la esquina de la celda (c, f)."""
+		return self.dimension * c, self.dimension * f
+
+def etiqueta_celda(c, f):
+	"""Devuelve la etiqueta del elemento del canvas que dibuja la celda (c, f)."""
+	return f"celda{c}_{f}"
+
+def celdas_cambiadas(anterior, grilla):
+	"""
+	Recibe dos grillas. Devuelve la lista de celdas (c, f) en las que difieren,
+	o None si tienen distintas dimensiones. Sólo recorre las filas distintas.
+	"""
+	if soko.dimensiones(anterior) != soko.dimensiones(grilla):
+		return None
+	cambios = []
+	for f, (fila_anterior, fila) in enumerate(zip(anterior, grilla)):
+		if fila_anterior == fila:
+			continue
+		for c, (antes, despues) in enumerate(zip(fila_anterior, fila)):
+			if antes != despues:
+				cambios.append((c, f))
+	return cambios
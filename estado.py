@@ -0,0 +1,223 @@
+import random
+import soko
+
+NORTE = (0, -1)
+SUR = (0, 1)
+ESTE = (1, 0)
+OESTE = (-1, 0)
+DIRECCIONES = (NORTE, SUR, ESTE, OESTE)
+SEMILLA_ZOBRIST = 20211204
+LETRAS = {NORTE: "u", SUR: "d", ESTE: "r", OESTE: "l"}
+
+class Nivel:
+	"""
+	Representa la capa estática de un nivel: sus dimensiones, las paredes
+	y los objetivos. Las celdas se identifican con un índice f * ancho + c
+	y los conjuntos de celdas se guardan como bits de un entero.
+	"""
+
+	def __init__(self, ancho, alto, paredes, objetivos):
+		"""Crea un nivel a partir de sus dimensiones y de las máscaras de paredes y objetivos."""
+		self.ancho = ancho
+		self.alto = alto
+		self.paredes = paredes
+		self.objetivos = objetivos
+		self.datos = {}
+
+	def indice(self, c, f):
+		"""Devuelve el índice de la celda en la columna y fila (c, f)."""
+		return f * self.ancho + c
+
+	def posicion(self, i):
+		"""Devuelve la columna y la fila de la celda con índice i."""
+		return i % self.ancho, i // self.ancho
+
+	def desplazamiento(self, direccion):
+		"""Devuelve cuánto cambia el índice de una celda al avanzar en la dirección recibida."""
+		dx, dy = direccion
+		return dx + dy * self.ancho
+
+	def hay_pared(self, i):
+		"""Devuelve True si hay una pared en la celda i."""
+		return (self.paredes >> i) & 1 == 1
+
+	def hay_objetivo(self, i):
+		"""Devuelve True si hay un objetivo en la celda i."""
+		return (self.objetivos >> i) & 1 == 1
+
+class Estado:
+	"""
+	Representa la capa dinámica de un nivel: la celda del jugador y el
+	conjunto de cajas. Los movimientos se hacen y se deshacen sobre el mismo
+	objeto, sin copiar la grilla. Además mantiene una firma Zobrist de 64
+	bits que se actualiza en cada movimiento.
+	"""
+
+	__slots__ = ("nivel", "jugador", "cajas", "firma")
+
+	def __init__(self, nivel, jugador, cajas):
+		"""Crea un estado del nivel con el jugador y las cajas recibidos."""
+		self.nivel = nivel
+		self.jugador = jugador
+		self.cajas = cajas
+		self.firma = firma_cajas(nivel, cajas) ^ zobrist(nivel)[1][jugador]
+
+	def __eq__(self, otro):
+		return isinstance(otro, Estado) and self.clave() == otro.clave()
+
+	def __hash__(self):
+		return hash(self.clave())
+
+	def clave(self):
+		"""Devuelve una clave que identifica al estado y que puede usarse en un conjunto o diccionario."""
+		return self.jugador, self.cajas
+
+	def copiar(self):
+		"""Devuelve un nuevo estado igual a este, que comparte el mismo nivel."""
+		return Estado(self.nivel, self.jugador, self.cajas)
+
+	def hay_caja(self, i):
+		"""Devuelve True si hay una caja en la celda i."""
+		return (self.cajas >> i) & 1 == 1
+
+	def juego_ganado(self):
+		"""Devuelve True si todos los objetivos tienen una caja."""
+		return self.nivel.objetivos & ~self.cajas == 0
+
+	def mover(self, direccion):
+		"""
+		Mueve el jugador en la dirección indicada modificando este estado.
+		Devuelve None si el movimiento no es válido (y el estado no cambia),
+		True si el jugador empujó una caja y False si sólo caminó.
+		"""
+		d = self.nivel.desplazamiento(direccion)
+		destino = self.jugador + d
+		if self.nivel.hay_pared(destino):
+			return None
+		if self.hay_caja(destino):
+			siguiente = destino + d
+			if self.nivel.hay_pared(siguiente) or self.hay_caja(siguiente):
+				return None
+			claves_cajas, claves_jugador = zobrist(self.nivel)
+			self.cajas ^= (1 << destino) | (1 << siguiente)
+			self.firma ^= claves_cajas[destino] ^ claves_cajas[siguiente]
+			self.firma ^= claves_jugador[self.jugador] ^ claves_jugador[destino]
+			self.jugador = destino
+			return True
+		claves_jugador = zobrist(self.nivel)[1]
+		self.firma ^= claves_jugador[self.jugador] ^ claves_jugador[destino]
+		self.jugador = destino
+		return False
+
+	def deshacer(self, direccion, empujo):
+		"""
+		Deshace un movimiento en la dirección indicada que haya devuelto
+		'empujo' al hacerse con mover.
+		"""
+		d = self.nivel.desplazamiento(direccion)
+		anterior = self.jugador - d
+		claves_cajas, claves_jugador = zobrist(self.nivel)
+		if empujo:
+			self.cajas ^= (1 << self.jugador) | (1 << (self.jugador + d))
+			self.firma ^= claves_cajas[self.jugador] ^ claves_cajas[self.jugador + d]
+		self.firma ^= claves_jugador[self.jugador] ^ claves_jugador[anterior]
+		self.jugador = anterior
+
+	def a_grilla(self):
+		"""Devuelve la grilla (lista de cadenas) que corresponde a este estado."""
+		nivel = self.nivel
+		grilla = []
+		for f in range(nivel.alto):
+			fila = []
+			for c in range(nivel.ancho):
+				i = f * nivel.ancho + c
+				fila.append(_caracter(nivel, self, i))
+			grilla.append("".join(fila))
+		return soko.crear_grilla(grilla)
+
+def _caracter(nivel, estado, i):
+	"""Devuelve el caracter de la grilla que representa la celda i."""
+	if nivel.hay_pared(i):
+		return soko.PARED
+	objetivo = nivel.hay_objetivo(i)
+	if estado.hay_caja(i):
+		return soko.OBJETIVO_Y_CAJA if objetivo else soko.CAJA
+	if estado.jugador == i:
+		return soko.OBJETIVO_Y_JUGADOR if objetivo else soko.JUGADOR
+	return soko.OBJETIVO if objetivo else soko.CELDA_VACIA
+
+def desde_grilla(grilla):
+	"""
+	Recibe una grilla (lista de cadenas) y devuelve el estado que le
+	corresponde, junto con un nuevo nivel con su capa estática.
+	"""
+	ancho, alto = soko.dimensiones(grilla)
+	paredes = objetivos = cajas = 0
+	jugador = None
+	for f in range(alto):
+		for c in range(ancho):
+			bit = 1 << (f * ancho + c)
+			if soko.hay_pared(grilla, c, f):
+				paredes |= bit
+			if soko.hay_objetivo(grilla, c, f):
+				objetivos |= bit
+			if soko.hay_caja(grilla, c, f):
+				cajas |= bit
+			if soko.hay_jugador(grilla, c, f):
+				jugador = f * ancho + c
+	return Estado(Nivel(ancho, alto, paredes, objetivos), jugador, cajas)
+
+def zobrist(nivel):
+	"""
+	Devuelve las tablas Zobrist del nivel: una lista con un número aleatorio
+	de 64 bits por celda para las cajas y otra para el jugador. Se generan
+	una sola vez por nivel y siempre con la misma semilla.
+	"""
+	if "zobrist" not in nivel.datos:
+		azar = random.Random(SEMILLA_ZOBRIST)
+		cantidad = nivel.ancho * nivel.alto
+		claves_cajas = [azar.getrandbits(64) for _ in range(cantidad)]
+		claves_jugador = [azar.getrandbits(64) for _ in range(cantidad)]
+		nivel.datos["zobrist"] = (claves_cajas, claves_jugador)
+	return nivel.datos["zobrist"]
+
+def firma_cajas(nivel, cajas):
+	"""Devuelve la firma Zobrist de la máscara de cajas recibida."""
+	claves_cajas = zobrist(nivel)[0]
+	firma = 0
+	for i in celdas(cajas):
+		firma ^= claves_cajas[i]
+	return firma
+
+def celdas(mascara):
+	"""Recibe una máscara de bits y devuelve la lista de índices de celdas que contiene."""
+	indices = []
+	while mascara:
+		bajo = mascara & -mascara
+		indices.append(bajo.bit_length() - 1)
+		mascara ^= bajo
+	return indices
+
+def a_lurd(inicial, direcciones):
+	"""
+	Recibe un estado y una secuencia de direcciones. Devuelve la cadena LURD
+	de esos movimientos: una letra por movimiento (u, d, l, r), en mayúscula
+	si el movimiento empuja una caja. El estado recibido no se modifica.
+	"""
+	actual = inicial.copiar()
+	letras = []
+	for direccion in direcciones:
+		empujo = actual.mover(direccion)
+		if empujo is None:
+			raise ValueError(f"Movimiento inválido: {direccion}")
+		letra = LETRAS[direccion]
+		letras.append(letra.upper() if empujo else letra)
+	return "".join(letras)
+
+def desde_lurd(texto):
+	"""Recibe una cadena LURD y devuelve la lista de direcciones que representa."""
+	direcciones = {letra: direccion for direccion, letra in LETRAS.items()}
+	try:
+		return [direcciones[letra] for letra in texto.lower()]
+	except KeyError as error:
+		raise ValueError(f"Letra inválida en la cadena LURD: {error}") from None
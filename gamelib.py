@@ -12,9 +12,12 @@ from queue import Queue, Empty
 from enum import Enum
 import threading
 import time
+import math
 import signal
 import os
 import sys
+import zlib
+from types import SimpleNamespace
 
 class _TkWindow(tk.Tk):
     instance = None
@@ -82,8 +85,27 @@ class _TkWindow(tk.Tk):
     def icon(self, path):
         self.tk.call('wm', 'iconphoto', self._w, self.get_image(path))
 
-    def draw_image(self, path, x, y):
-        self.canvas.create_image(x, y, anchor='nw', image=self.get_image(path))
+    def draw_image(self, path, x, y, options):
+        self.canvas.create_image(x, y, anchor='nw', image=self.get_image(path), **options)
+
+    def move_items(self, tag, x, y):
+        self.canvas.coords(tag, x, y)
+
+    def compose_image(self, name, paths, size):
+        images = [self.get_image(path) for path in paths]
+        width, height = images[0].width(), images[0].height()
+        composed = tk.PhotoImage(width=width, height=height)
+        for image in images:
+            composed.tk.call(composed, 'copy', image)
+        if size is not None and (size, size) != (width, height):
+            composed = _scale_image(composed, width, size)
+        self.assets[name] = composed
+
+    def set_items_image(self, tag, path):
+        self.canvas.itemconfigure(tag, image=self.get_image(path))
+
+    def delete_items(self, tag):
+        self.canvas.delete(tag)
 
     def draw(self, type, args, kwargs):
         options = {'fill': 'white'}
@@ -123,6 +145,246 @@ class _TkWindow(tk.Tk):
     def with_window(self, func, args):
         func(self, *args)
 
+    def run_frame(self, commands):
+        methods = {}
+        for method, *args in commands:
+            if method not in methods:
+                methods[method] = getattr(self, method)
+            methods[method](*args)
+
+class _HeadlessWindow:
+    """
+    A window that is never shown, used by `init_headless`. It runs the same
+    commands as the Tk window, but on a list of items kept in memory (one dict
+    per item, in drawing order), and it can render them off-screen to a PPM
+    image. Events come from a script instead of the keyboard and mouse.
+    """
+
+    default_size = (300, 300)
+    colors = {
+        'white': (255, 255, 255), 'black': (0, 0, 0), 'red': (255, 0, 0),
+        'green': (0, 128, 0), 'blue': (0, 0, 255), 'yellow': (255, 255, 0),
+        'gray': (190, 190, 190), 'grey': (190, 190, 190),
+    }
+
+    def __init__(self, events, on_frame=None, on_event=None):
+        self.closed = False
+        self.events = iter(events)
+        self.on_frame = on_frame
+        self.on_event = on_event
+        self.window_title = "Gamelib"
+        self.width, self.height = self.default_size
+        self.assets = {}
+        self.items = []
+        self.messages = []
+        self.frames = 0
+
+    def close(self):
+        self.closed = True
+        _TkWindow.instance = None
+        _GameThread.events.put(None)
+
+    def notify(self):
+        self.process_commands()
+
+    def process_commands(self):
+        while True:
+            try:
+                method, *args = _TkWindow.commands.get(False)
+            except Empty:
+                break
+            getattr(self, method)(*args)
+
+    def feed_event(self):
+        """Queue the next scripted event, or close the window if there are no more."""
+        if self.closed or not _GameThread.events.empty():
+            return
+        event = next(self.events, None)
+        if event is None:
+            self.close()
+            return
+        if isinstance(event, str):
+            event = make_event(EventType.KeyPress, key=event)
+        if self.on_event:
+            self.on_event(event)
+        _GameThread.events.put(event)
+
+    def title(self, s):
+        self.window_title = s
+
+    def resize(self, w, h):
+        self.width, self.height = w, h
+
+    def clear(self):
+        self.items = []
+
+    def icon(self, path):
+        pass
+
+    def update(self):
+        self.frames += 1
+        if self.on_frame:
+            self.on_frame(self)
+
+    def add_item(self, type, x, y, options, **attributes):
+        tags = options.get('tags', ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        item = {'type': type, 'x': x, 'y': y, 'tags': tuple(tags), 'options': options}
+        item.update(attributes)
+        self.items.append(item)
+
+    def matching_items(self, tag):
+        return [item for item in self.items if tag == 'all' or tag in item['tags']]
+
+    def draw_image(self, path, x, y, options):
+        self.add_item('image', x, y, options, image=path)
+
+    def move_items(self, tag, x, y):
+        for item in self.matching_items(tag):
+            item['x'], item['y'] = x, y
+
+    def compose_image(self, name, paths, size):
+        self.assets[name] = ('composed', tuple(paths), size)
+
+    def set_items_image(self, tag, path):
+        for item in self.matching_items(tag):
+            item['image'] = path
+
+    def delete_items(self, tag):
+        deleted = {id(item) for item in self.matching_items(tag)}
+        self.items = [item for item in self.items if id(item) not in deleted]
+
+    def draw(self, type, args, kwargs):
+        options = {'fill': 'white'}
+        options.update(kwargs)
+        self.add_item(type, args[0], args[1], options, coords=list(args))
+
+    def draw_text(self, text, x, y, font, size, bold, italic, kwargs):
+        options = {'fill': 'white'}
+        options.update(kwargs)
+        self.add_item('text', x, y, options, text=text)
+
+    def say(self, message, done):
+        self.messages.append(message)
+        done.put(True)
+
+    def input(self, prompt, response):
+        self.messages.append(prompt)
+        response.put(None)
+
+    def with_window(self, func, args):
+        func(self, *args)
+
+    def run_frame(self, commands):
+        for method, *args in commands:
+            getattr(self, method)(*args)
+
+    def texts(self):
+        """Return the texts currently drawn, in drawing order."""
+        return [item['text'] for item in self.items if item['type'] == 'text']
+
+    def to_ppm(self):
+        """
+        Render the items currently drawn and return a binary PPM (P6) image.
+
+        PPM images are drawn as they are. Any other image (or composed image)
+        is drawn as a rectangle of its size filled with a color derived from its
+        name, so that different images can be told apart. Rectangles are drawn
+        filled; text and the other items are not rendered.
+        """
+        width, height = self.width, self.height
+        pixels = bytearray(width * height * 3)
+        for item in self.items:
+            if item['type'] == 'image':
+                w, h, rows = self.get_pixels(item['image'])
+                self.blit(pixels, item['x'], item['y'], w, h, rows)
+            elif item['type'] == 'rectangle':
+                x1, y1, x2, y2 = (int(v) for v in item['coords'])
+                w, h = abs(x2 - x1), abs(y2 - y1)
+                row = bytes(self.parse_color(item['options'].get('fill'))) * w
+                self.blit(pixels, min(x1, x2), min(y1, y2), w, h, [row] * h)
+        return b'P6 %d %d 255\n' % (width, height) + bytes(pixels)
+
+    def blit(self, pixels, x, y, w, h, rows):
+        x, y = int(x), int(y)
+        left, right = max(0, x), min(self.width, x + w)
+        if left >= right:
+            return
+        for j in range(max(0, -y), min(h, self.height - y)):
+            start = ((y + j) * self.width + left) * 3
+            pixels[start:start + (right - left) * 3] = rows[j][(left - x) * 3:(right - x) * 3]
+
+    def get_pixels(self, name):
+        key = ('pixels', name)
+        if key not in self.assets:
+            asset = self.assets.get(name)
+            if asset is not None and asset[0] == 'composed':
+                _, paths, size = asset
+                w, h = (size, size) if size else _image_size(paths[0])
+            elif name[-4:].lower() in ('.ppm', '.pgm'):
+                self.assets[key] = _read_pnm(name)
+                return self.assets[key]
+            else:
+                w, h = _image_size(name)
+            crc = zlib.crc32(name.encode())
+            color = bytes((crc & 0xff, (crc >> 8) & 0xff, (crc >> 16) & 0xff))
+            self.assets[key] = (w, h, [color * w] * h)
+        return self.assets[key]
+
+    def parse_color(self, color):
+        if not color:
+            return (0, 0, 0)
+        if color.startswith('#') and len(color) == 7:
+            return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+        return self.colors.get(color.lower(), (255, 255, 255))
+
+def _image_size(path):
+    "Return the width and height of a GIF, PNG or PPM/PGM image, reading only its header"
+    with open(path, 'rb') as f:
+        header = f.read(32)
+    if header[:3] == b'GIF':
+        return int.from_bytes(header[6:8], 'little'), int.from_bytes(header[8:10], 'little')
+    if header[:8] == b'\x89PNG\r\n\x1a\n':
+        return int.from_bytes(header[16:20], 'big'), int.from_bytes(header[20:24], 'big')
+    w, h, _, _ = _read_pnm(path)
+    return w, h
+
+def _read_pnm(path):
+    "Read a binary PPM (P6) or PGM (P5) image and return its width, height and RGB rows"
+    with open(path, 'rb') as f:
+        data = f.read()
+    fields = []
+    pos = 0
+    while len(fields) < 4:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b'#':
+            pos = data.index(b'\n', pos)
+            continue
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[pos:end])
+        pos = end
+    magic, w, h = fields[0], int(fields[1]), int(fields[2])
+    body = data[pos + 1:]
+    if magic == b'P5':
+        body = bytes(v for v in body[:w * h] for _ in range(3))
+    elif magic != b'P6':
+        raise ValueError(f"{path}: only binary PPM (P6) and PGM (P5) images are supported")
+    return w, h, [body[j * w * 3:(j + 1) * w * 3] for j in range(h)]
+
+def _scale_image(image, current, size):
+    "Scale a square image from `current` to `size` pixels per side (nearest neighbour)"
+    divisor = math.gcd(current, size)
+    zoom, subsample = size // divisor, current // divisor
+    if zoom > 1:
+        image = image.zoom(zoom)
+    if subsample > 1:
+        image = image.subsample(subsample)
+    return image
+
 def check_image_format(path):
     "Produce a warning message if the image format is not supported"
     ext = path[-4:].lower()
@@ -223,10 +485,12 @@ def _audio_init():
 
         Note:
             The only sound format that is supported accross all platforms (Windows/Mac/Linux)
-            is WAV.
+            is WAV. In headless mode (see `init_headless`) no sound is played.
         """
 
         check_audio_format(sound)
+        if isinstance(_TkWindow.instance, _HeadlessWindow):
+            return
         if system == 'Windows':
             _playsoundWin(sound)
         elif system == 'Darwin':
@@ -267,11 +531,45 @@ class _GameThread(threading.Thread):
             # block until Tk is initialized
             _TkWindow.initialized.wait()
 
+    def feed_events(self):
+        w = _TkWindow.instance
+        if isinstance(w, _HeadlessWindow):
+            w.feed_event()
+
+    frame_commands = None
+    frame_notify = False
+
     def send_command_to_tk(self, *args, notify=False):
+        if self.frame_commands is not None:
+            self.frame_commands.append(args)
+            self.frame_notify = self.frame_notify or notify
+            return
         _TkWindow.commands.put(args)
         if notify:
             self.notify_tk()
 
+    def frame(self):
+        """
+        Group the drawing commands issued inside a `with` block into a single frame.
+
+        Instead of sending each command to the window separately, the whole frame is
+        sent in one operation when the block ends, and the window applies it in a
+        single pass. Nested frames are part of the outermost one.
+
+        Functions that wait for an answer from the window (`say`, `input`) must not
+        be called inside a frame.
+
+        Example:
+            ```
+            with gamelib.frame():
+                gamelib.draw_begin()
+                for x in range(0, 300, 10):
+                    gamelib.draw_image('images/grass.gif', x, 0)
+                gamelib.draw_end()
+            ```
+        """
+        return _Frame(self)
+
     def wait(self, event_type=None):
         """
         Wait until the next `Event`: a key is pressed/released, the mouse is moved, etc,
@@ -296,12 +594,14 @@ class _GameThread(threading.Thread):
             ```
         """
         self.notify_tk()
+        self.feed_events()
         if not _TkWindow.instance:
             return None
         while True:
             event = _GameThread.events.get()
             if not event or not event_type or event.type == event_type:
                 return event
+            self.feed_events()
 
     def get_events(self):
         """
@@ -319,6 +619,7 @@ class _GameThread(threading.Thread):
             ```
         """
         self.notify_tk()
+        self.feed_events()
         events = []
         while True:
             try:
@@ -365,10 +666,15 @@ class _GameThread(threading.Thread):
         _TkWindow.idle.wait()
         self.send_command_to_tk('clear')
 
-    def draw_image(self, path, x, y):
+    def draw_image(self, path, x, y, **options):
         """
         Draw an image located at `path` in the coordinates `x, y`.
 
+        Some of the supported extra options are:
+
+        * `tags`: A tag (or tuple of tags) for the image, so that it can be moved,
+          changed or deleted later with `move_items`, `set_items_image` and `delete_items`.
+
         Example:
             ```
             gamelib.draw_image('images/player.gif', 10, 10)
@@ -378,7 +684,63 @@ class _GameThread(threading.Thread):
             The only image formats that are supported accross all platforms (Windows/Mac/Linux)
             are GIF and PPM/PGM/PBM.
         """
-        self.send_command_to_tk('draw_image', path, x, y)
+        self.send_command_to_tk('draw_image', path, x, y, options)
+
+    def compose_image(self, name, paths, size=None):
+        """
+        Create an image called `name` by stacking the images located at `paths`
+        (the first one at the bottom, the following ones on top, respecting
+        transparency). If `size` is given the result is scaled to `size` x `size`
+        pixels; scaling is cheapest when `size` and the original size have a large
+        common divisor.
+
+        The composed image can be used anywhere an image path is accepted.
+
+        Example:
+            ```
+            gamelib.compose_image('grass+tree', ['images/grass.gif', 'images/tree.gif'], size=32)
+            gamelib.draw_image('grass+tree', 10, 10)
+            ```
+        """
+        self.send_command_to_tk('compose_image', name, list(paths), size)
+
+    def move_items(self, tag, x, y):
+        """
+        Move the items drawn with the given `tag` to the coordinates `x, y`,
+        without redrawing the rest of the window.
+
+        Example:
+            ```
+            gamelib.draw_image('images/player.gif', 10, 10, tags='player')
+            gamelib.move_items('player', 20, 10)
+            ```
+        """
+        self.send_command_to_tk('move_items', tag, x, y)
+
+    def set_items_image(self, tag, path):
+        """
+        Replace the image of the items drawn with the given `tag` by the image
+        located at `path`.
+
+        Example:
+            ```
+            gamelib.draw_image('images/player.gif', 10, 10, tags='player')
+            gamelib.set_items_image('player', 'images/player_2.gif')
+            ```
+        """
+        self.send_command_to_tk('set_items_image', tag, path)
+
+    def delete_items(self, tag):
+        """
+        Delete the items drawn with the given `tag`.
+
+        Example:
+            ```
+            gamelib.draw_text('Paused', 10, 10, tags='message')
+            gamelib.delete_items('message')
+            ```
+        """
+        self.send_command_to_tk('delete_items', tag)
 
     def draw_text(self, text, x, y, font=None, size=12, bold=False, italic=False, **options):
         """
@@ -566,14 +928,39 @@ class _GameThread(threading.Thread):
         _GameThread._last_loop_time = time.time()
         return self.is_alive()
 
+class _Frame:
+    def __init__(self, game_thread):
+        self.game_thread = game_thread
+        self.outermost = False
+
+    def __enter__(self):
+        if self.game_thread.frame_commands is None:
+            self.outermost = True
+            self.game_thread.frame_commands = []
+            self.game_thread.frame_notify = False
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.outermost:
+            return
+        commands = self.game_thread.frame_commands
+        self.game_thread.frame_commands = None
+        if commands:
+            self.game_thread.send_command_to_tk('run_frame', commands, notify=self.game_thread.frame_notify)
+
 _GameThread.instance = _GameThread()
 
 wait = _GameThread.instance.wait
 get_events = _GameThread.instance.get_events
 title = _GameThread.instance.title
 icon = _GameThread.instance.icon
+frame = _GameThread.instance.frame
 draw_begin = _GameThread.instance.draw_begin
 draw_image = _GameThread.instance.draw_image
+compose_image = _GameThread.instance.compose_image
+move_items = _GameThread.instance.move_items
+set_items_image = _GameThread.instance.set_items_image
+delete_items = _GameThread.instance.delete_items
 draw_text = _GameThread.instance.draw_text
 draw_arc = _GameThread.instance.draw_arc
 draw_line = _GameThread.instance.draw_line
@@ -602,7 +989,17 @@ def init(game_main, args=None):
     Args:
         game_main: Your `main` function.
         args: List of arguments to be passed to the `main` function, or `None`.
+
+    If the `GAMELIB_HEADLESS` environment variable is set, the game runs with
+    `init_headless` instead, without opening a window; its events are key
+    presses of the comma separated keys in the `GAMELIB_KEYS` environment
+    variable (e.g. `GAMELIB_KEYS=Right,Right,Up,Escape`).
     """
+    if os.environ.get('GAMELIB_HEADLESS'):
+        keys = [key for key in os.environ.get('GAMELIB_KEYS', '').split(',') if key]
+        init_headless(game_main, args, events=keys)
+        return
+
     _GameThread.instance.start(game_main, args or [])
 
     # block until wait(), get_events(), etc called on game thread.
@@ -625,6 +1022,69 @@ def init(game_main, args=None):
             os._exit(1)
         os._exit(0)
 
+def init_headless(game_main, args=None, events=(), on_frame=None, on_event=None):
+    """
+    Run the game without a window (for example, in automated tests or
+    benchmarks on a computer without a display).
+
+    `game_main` runs in the calling thread, and every drawing function works
+    on an off-screen window that keeps the drawn items in memory. The events
+    are taken from `events`: each time the game calls `wait` or `get_events`
+    and there are no pending events, the next one is delivered. When there are
+    no more events the window is closed, as if the user had closed it. Dialogs
+    (`say`, `input`) return immediately, `input` returns `None` and no sound is
+    played.
+
+    Args:
+        game_main: Your `main` function.
+        args: List of arguments to be passed to the `main` function, or `None`.
+        events: An iterable of `Event`s (see `make_event`); a string is a
+                shorthand for a key press of that key.
+        on_frame: A function called with the window at the end of every frame
+                  (`draw_end`). The window has the attributes `items`,
+                  `width`, `height`, `window_title`, `messages` and `frames`,
+                  and the methods `texts()` and `to_ppm()`.
+        on_event: A function called with each event just before it is delivered.
+
+    Returns:
+        The off-screen window, after the game ends.
+
+    Example:
+        ```
+        gamelib.init_headless(main, events=['Right', 'Right', 'Escape'],
+                              on_frame=lambda window: frames.append(window.to_ppm()))
+        ```
+    """
+    for queue in (_GameThread.events, _TkWindow.commands):
+        while True:
+            try:
+                queue.get(False)
+            except Empty:
+                break
+    window = _HeadlessWindow(events, on_frame, on_event)
+    _TkWindow.instance = window
+    _TkWindow.initialized.set()
+    _GameThread.initialized.set()
+    try:
+        game_main(*(args or []))
+        window.process_commands()
+    finally:
+        window.closed = True
+        _TkWindow.instance = None
+    return window
+
+def make_event(type, key=None, mouse_button=None, x=0, y=0):
+    """
+    Create an `Event` of the given `EventType`, for example to feed scripted
+    events to `init_headless`.
+
+    Example:
+        ```
+        gamelib.make_event(gamelib.EventType.KeyPress, key='Up')
+        ```
+    """
+    return Event(SimpleNamespace(type=type, keysym=key, num=mouse_button, x=x, y=y))
+
 class EventType(Enum):
     "An enumeration of the different types of `Event`s supported by gamelib."
 
@@ -0,0 +1,142 @@
+from collections import deque
+import estado
+import bloqueos
+
+INFINITO = float("inf")
+
+def objetivos(nivel):
+	"""Devuelve la lista de celdas con objetivo del nivel, calculándola una sola vez."""
+	if "objetivos" not in nivel.datos:
+		nivel.datos["objetivos"] = estado.celdas(nivel.objetivos)
+	return nivel.datos["objetivos"]
+
+def distancias_de_empuje(nivel):
+	"""
+	Devuelve la tabla de distancias de empuje del nivel, calculándola una sola
+	vez: una lista con una entrada por celda, que es a su vez una lista con la
+	menor cantidad de empujes que lleva una caja desde esa celda hasta cada
+	objetivo (en el orden de objetivos(nivel)), o infinito si no puede llegar.
+	Las distancias respetan las paredes pero no las demás cajas, así que nunca
+	sobrestiman. Se calculan tirando de una caja hacia atrás desde cada objetivo.
+	"""
+	if "distancias" not in nivel.datos:
+		tabla = [[] for _ in range(nivel.ancho * nivel.alto)]
+		for objetivo in objetivos(nivel):
+			for celda, distancia in enumerate(distancias_a_objetivo(nivel, objetivo)):
+				tabla[celda].append(distancia)
+		nivel.datos["distancias"] = tabla
+	return nivel.datos["distancias"]
+
+def distancias_a_objetivo(nivel, objetivo):
+	"""
+	Devuelve una lista con la menor cantidad de empujes que lleva una caja
+	desde cada celda del nivel hasta el objetivo recibido (infinito si no
+	puede llegar), recorriendo a lo ancho los tirones desde el objetivo.
+	"""
+	return recorrer_caja(nivel, objetivo, True)
+
+def distancias_desde(nivel, origenes):
+	"""
+	Recibe un nivel y una lista de celdas de origen. Devuelve una tabla como
+	la de distancias_de_empuje pero hacia atrás: para cada celda, la menor
+	cantidad de empujes que lleva una caja desde cada origen hasta esa celda.
+	"""
+	tabla = [[] for _ in range(nivel.ancho * nivel.alto)]
+	for origen in origenes:
+		for celda, distancia in enumerate(recorrer_caja(nivel, origen, False)):
+			tabla[celda].append(distancia)
+	return tabla
+
+def recorrer_caja(nivel, origen, tirando):
+	"""
+	Recorre a lo ancho las posiciones a las que llega una caja que parte de la
+	celda de origen, tirando de ella si 'tirando' es True o empujándola si no.
+	Devuelve una lista con la cantidad mínima de pasos hasta cada celda del
+	nivel, o infinito si la caja no llega.
+	"""
+	distancias = [INFINITO] * (nivel.ancho * nivel.alto)
+	distancias[origen] = 0
+	pendientes = deque([origen])
+	while pendientes:
+		caja = pendientes.popleft()
+		for dx, dy in estado.DIRECCIONES:
+			destino = bloqueos.vecina(nivel, caja, (dx, dy))
+			if destino is None or nivel.hay_pared(destino) or distancias[destino] != INFINITO:
+				continue
+			if tirando:
+				jugador = bloqueos.vecina(nivel, destino, (dx, dy))
+			else:
+				jugador = bloqueos.vecina(nivel, caja, (-dx, -dy))
+			if jugador is None or nivel.hay_pared(jugador):
+				continue
+			distancias[destino] = distancias[caja] + 1
+			pendientes.append(destino)
+	return distancias
+
+def cota_inferior(nivel, cajas):
+	"""
+	Recibe un nivel y una máscara de cajas. Devuelve una cota inferior de la
+	cantidad de empujes que faltan para ganar: el costo del emparejamiento de
+	costo mínimo entre cajas y objetivos según las distancias de empuje.
+	"""
+	return cota_con_tabla(distancias_de_empuje(nivel), cajas)
+
+def cota_con_tabla(tabla, cajas):
+	"""
+	Recibe una tabla de distancias (como la de distancias_de_empuje) y una
+	máscara de cajas. Devuelve el costo del emparejamiento de costo mínimo
+	entre las cajas y los destinos de la tabla.
+	"""
+	return emparejamiento_minimo([tabla[caja] for caja in estado.celdas(cajas)])
+
+def emparejamiento_minimo(costos):
+	"""
+	Recibe una matriz de costos de n filas y m columnas (n <= m) y devuelve
+	el costo mínimo de asignar cada fila a una columna distinta, usando el
+	algoritmo húngaro. Si no hay filas devuelve 0.
+	"""
+	n = len(costos)
+	if n == 0:
+		return 0
+	m = len(costos[0])
+	u = [0] * (n + 1)
+	v = [0] * (m + 1)
+	asignada = [0] * (m + 1)
+	camino = [0] * (m + 1)
+	for i in range(1, n + 1):
+		asignada[0] = i
+		j0 = 0
+		minimos = [INFINITO] * (m + 1)
+		usadas = [False] * (m + 1)
+		while True:
+			usadas[j0] = True
+			i0 = asignada[j0]
+			delta = INFINITO
+			j1 = 0
+			fila = costos[i0 - 1]
+			for j in range(1, m + 1):
+				if usadas[j]:
+					continue
+				actual = fila[j - 1] - u[i0] - v[j]
+				if actual < minimos[j]:
+					minimos[j] = actual
+					camino[j] = j0
+				if minimos[j] < delta:
+					delta = minimos[j]
+					j1 = j
+			if delta == INFINITO:
+				return INFINITO
+			for j in range(m + 1):
+				if usadas[j]:
+					u[asignada[j]] += delta
+					v[j] -= delta
+				else:
+					minimos[j] -= delta
+			j0 = j1
+			if asignada[j0] == 0:
+				break
+		while j0:
+			j1 = camino[j0]
+			asignada[j0] = asignada[j1]
+			j0 = j1
+	return -v[0]
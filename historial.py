@@ -0,0 +1,109 @@
+import soko
+import estado
+from estado import DIRECCIONES
+
+INTERVALO_PUNTOS_DE_CONTROL = 100
+
+class Historial:
+	"""
+	Representa los movimientos realizados en un nivel, con deshacer y rehacer
+	ilimitados. En lugar de guardar la grilla anterior a cada movimiento, cada
+	movimiento ocupa un byte con su dirección y si empujó una caja: deshacer
+	es hacer el movimiento inverso (soko.retroceder) y rehacer es volver a
+	moverse. Cada 'intervalo' movimientos se guarda además la grilla completa
+	como punto de control, para poder saltar a cualquier movimiento sin
+	repetir todos los anteriores.
+	"""
+
+	def __init__(self, grilla, intervalo=INTERVALO_PUNTOS_DE_CONTROL):
+		"""Crea un historial vacío que empieza en la grilla recibida."""
+		self.intervalo = intervalo
+		self.movimientos = bytearray()
+		self.actual = 0
+		self.puntos_de_control = [grilla]
+
+	def __len__(self):
+		"""Devuelve la cantidad de movimientos realizados, sin contar los deshechos."""
+		return self.actual
+
+	def mover(self, grilla, direccion):
+		"""
+		Recibe la grilla actual y una dirección. Mueve al jugador y, si el
+		movimiento cambió la grilla, lo registra y descarta los movimientos
+		que se podían rehacer. Devuelve la grilla resultante.
+		"""
+		nueva_grilla = soko.mover(grilla, direccion)
+		if nueva_grilla == grilla:
+			return grilla
+		fila, columna = soko.obtener_posicion_jugador(grilla)
+		dx, dy = direccion
+		con_caja = soko.hay_caja(grilla, columna + dx, fila + dy)
+		del self.movimientos[self.actual:]
+		del self.puntos_de_control[self.actual // self.intervalo + 1:]
+		self.movimientos.append(codificar(direccion, con_caja))
+		self.actual += 1
+		if self.actual % self.intervalo == 0:
+			self.puntos_de_control.append(nueva_grilla)
+		return nueva_grilla
+
+	def puede_deshacer(self):
+		"""Devuelve True si hay algún movimiento para deshacer."""
+		return self.actual > 0
+
+	def puede_rehacer(self):
+		"""Devuelve True si hay algún movimiento deshecho para rehacer."""
+		return self.actual < len(self.movimientos)
+
+	def deshacer(self, grilla):
+		"""
+		Recibe la grilla actual y devuelve la grilla anterior al último
+		movimiento. Si no hay movimientos, devuelve la misma grilla.
+		"""
+		if not self.puede_deshacer():
+			return grilla
+		self.actual -= 1
+		direccion, con_caja = decodificar(self.movimientos[self.actual])
+		return soko.retroceder(grilla, direccion, con_caja)
+
+	def rehacer(self, grilla):
+		"""
+		Recibe la grilla actual y devuelve la grilla posterior al último
+		movimiento deshecho. Si no hay movimientos deshechos, devuelve la misma
+		grilla.
+		"""
+		if not self.puede_rehacer():
+			return grilla
+		direccion, _ = decodificar(self.movimientos[self.actual])
+		self.actual += 1
+		return soko.mover(grilla, direccion)
+
+	def ir_a(self, numero):
+		"""
+		Recibe un número de movimiento (entre 0 y la cantidad de movimientos
+		registrados, contando los deshechos) y devuelve la grilla que había
+		después de ese movimiento. Parte del punto de control anterior más
+		cercano, así que repite a lo sumo 'intervalo' movimientos.
+		"""
+		numero = max(0, min(numero, len(self.movimientos)))
+		punto = min(numero // self.intervalo, len(self.puntos_de_control) - 1)
+		grilla = self.puntos_de_control[punto]
+		for codigo in self.movimientos[punto * self.intervalo:numero]:
+			grilla = soko.mover(grilla, decodificar(codigo)[0])
+		self.actual = numero
+		return grilla
+
+	def direcciones(self):
+		"""Devuelve la lista de direcciones de los movimientos realizados, sin contar los deshechos."""
+		return [decodificar(codigo)[0] for codigo in self.movimientos[:self.actual]]
+
+	def lurd(self):
+		"""Devuelve los movimientos realizados, sin contar los deshechos, en formato LURD."""
+		return estado.a_lurd(estado.desde_grilla(self.puntos_de_control[0]), self.direcciones())
+
+def codificar(direccion, con_caja):
+	"""Devuelve el byte que representa un movimiento en la dirección recibida, con o sin caja."""
+	return DIRECCIONES.index(direccion) * 2 + con_caja
+
+def decodificar(codigo):
+	"""Devuelve la dirección y si empujó una caja del movimiento representado por el byte recibido."""
+	return DIRECCIONES[codigo // 2], bool(codigo % 2)
@@ -0,0 +1,80 @@
+import time
+
+INTERVALO_PROGRESO = 1000
+
+class Estadisticas:
+	"""
+	Representa los contadores de una búsqueda: los estados expandidos, los
+	sucesores podados por bloqueos o por no tener solución, los duplicados
+	(estados ya alcanzados con una profundidad menor o igual), la profundidad
+	máxima expandida y el tamaño de la frontera. Si se recibe una función de
+	progreso, se la llama con las estadísticas cada 'intervalo' estados
+	expandidos, desde el hilo de la búsqueda.
+	"""
+
+	def __init__(self, progreso=None, intervalo=INTERVALO_PROGRESO):
+		"""Crea las estadísticas de una búsqueda que todavía no empezó."""
+		self.progreso = progreso
+		self.intervalo = intervalo
+		self.expandidos = 0
+		self.podados = 0
+		self.duplicados = 0
+		self.profundidad_maxima = 0
+		self.frontera = 0
+		self.frontera_maxima = 0
+		self.inicio = time.perf_counter()
+		self.fin = None
+
+	def expandir(self, profundidad, frontera):
+		"""
+		Registra que se expandió un estado de la profundidad recibida con la
+		frontera del tamaño recibido, y avisa el progreso si corresponde.
+		"""
+		self.expandidos += 1
+		self.frontera = frontera
+		if profundidad > self.profundidad_maxima:
+			self.profundidad_maxima = profundidad
+		if frontera > self.frontera_maxima:
+			self.frontera_maxima = frontera
+		if self.progreso is not None and self.expandidos % self.intervalo == 0:
+			self.progreso(self)
+
+	def actualizar(self, expandidos, podados, duplicados, profundidad_maxima, frontera_maxima):
+		"""
+		Reemplaza los contadores por los recibidos, los de una búsqueda que
+		corre en otros procesos, y avisa el progreso si desde la última
+		actualización se pasó un múltiplo del intervalo de estados expandidos.
+		"""
+		anteriores = self.expandidos
+		self.expandidos = expandidos
+		self.podados = podados
+		self.duplicados = duplicados
+		self.profundidad_maxima = profundidad_maxima
+		self.frontera_maxima = frontera_maxima
+		if self.progreso is not None and expandidos // self.intervalo > anteriores // self.intervalo:
+			self.progreso(self)
+
+	def terminar(self):
+		"""Registra que la búsqueda terminó."""
+		self.fin = time.perf_counter()
+
+	def segundos(self):
+		"""Devuelve los segundos que lleva (o que llevó) la búsqueda."""
+		fin = self.fin if self.fin is not None else time.perf_counter()
+		return fin - self.inicio
+
+	def nodos_por_segundo(self):
+		"""Devuelve la cantidad de estados expandidos por segundo."""
+		segundos = self.segundos()
+		return round(self.expandidos / segundos) if segundos else 0
+
+	def como_diccionario(self):
+		"""Devuelve un diccionario con los contadores, para guardarlos o mostrarlos."""
+		return {
+			"expandidos": self.expandidos,
+			"podados": self.podados,
+			"duplicados": self.duplicados,
+			"profundidad_maxima": self.profundidad_maxima,
+			"frontera_maxima": self.frontera_maxima,
+			"nodos_por_segundo": self.nodos_por_segundo(),
+		}
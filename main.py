@@ -1,60 +1,26 @@
+import argparse
 import soko
 import gamelib
-from pila import Pila
-
+import repeticiones
+from historial import Historial
+from segundo_plano import BusquedaEnSegundoPlano
+from backtracking import cerrar_procesos
+from archivos import copiar_teclas
+from paquete_binario import abrir_paquete
+from cache_soluciones import CacheSoluciones, ruta_cache
+from pistas import SesionPista
+from dibujo import Renderizador
+
+ARCHIVO_NIVELES = "niveles.txt"
 DIMENSION_CELDA = 63
-SALTO_DE_LINEA = "\n"
 REINICIAR = "REINICIAR"
 SALIR = "SALIR"
 CONTINUAR = "CONTINUAR"
 DESHACER = "DESHACER"
+REHACER = "REHACER"
 SOLUCION = "SOLUCION"
-
-def copiar_niveles(ruta_archivo):
-	"""
-	Recibe la ruta de un archivo que contiene muchos niveles. Devuelve una lista con 
-	todos los niveles que se encuentran en el archivo.
-	"""
-	niveles = []
-	with open(ruta_archivo) as archivo:
-		for linea in archivo:
-			if "Level" in linea:
-				nivel = []
-			elif linea == SALTO_DE_LINEA:
-				completar_lineas(nivel)
-				niveles.append(nivel)
-			elif "'" not in linea:
-				nivel.append(linea.rstrip())
-	return niveles
-
-def copiar_teclas(ruta_archivo):
-	"""
-	Recibe la ruta de un archivo que contiene la referencia a las teclas. Devuelve un
-	diccionario en el que las claves son las teclas y sus valores correspondientes son
-	las acciones.
-	"""
-	teclas = {}
-	with open(ruta_archivo) as archivo:
-		for linea in archivo:
-			if linea == SALTO_DE_LINEA:
-				continue
-			tecla, referencia = linea.rstrip().split("=")
-			teclas[tecla.rstrip()] = referencia.lstrip(" ")
-	return teclas
-
-def completar_lineas(grilla):
-	"""
-	Recibe una grilla en forma de lista. Si las filas de la grilla no tienen la
-	misma cantidad de columnas, modifica la grilla para que ahora todas las filas
-	tengan la misma longitud.  
-	"""
-	ancho = 0
-	for fila in grilla:
-		if len(fila) > ancho:
-			ancho = len(fila)
-	for i, fila in enumerate(grilla):
-		incompletas = ancho - len(fila)
-		grilla[i] = fila + (" " * incompletas)
+BUSQUEDA_TERMINADA = "BUSQUEDA_TERMINADA"
+FPS_ESPERA = 30
 
 def obtener_grilla(nivel, niveles):
 	"""Recibe un nivel y devuelve la grilla correspondiente a ese nivel"""
@@ -62,35 +28,23 @@ def obtener_grilla(nivel, niveles):
 	grilla = soko.crear_grilla(grilla)
 	return grilla
 
-def dibujar_grilla(grilla):
-	"""Recibe una grilla y dibuja cada celda de la grilla"""
-	ancho, largo = soko.dimensiones(grilla)
-	gamelib.resize(DIMENSION_CELDA * ancho, DIMENSION_CELDA * largo)
-	gamelib.draw_begin()
-	for f in range(largo):
-		fila = DIMENSION_CELDA * f
-		for c in range(ancho):
-			columna = DIMENSION_CELDA * c
-			gamelib.draw_image('img/ground.gif', columna, fila)
-			if soko.hay_caja(grilla, c, f):
-				gamelib.draw_image('img/box.gif', columna, fila)
-			if soko.hay_objetivo(grilla, c, f):
-				gamelib.draw_image('img/goal.gif', columna, fila)
-			if soko.hay_jugador(grilla, c, f):
-				if soko.hay_objetivo(grilla, c, f):
-					gamelib.draw_image('img/player_2.gif', columna, fila)
-				else:
-					gamelib.draw_image('img/player.gif', columna, fila)
-			if soko.hay_pared(grilla, c, f):
-				gamelib.draw_image('img/wall.gif', columna, fila)
-	gamelib.draw_end()
+def dibujar_grilla(renderizador, grilla, mensaje=None):
+	"""
+	Recibe el renderizador, una grilla y opcionalmente un mensaje (texto y
+	coordenadas). Dibuja la grilla, actualizando sólo las celdas que cambiaron.
+	"""
+	renderizador.dibujar(grilla, mensaje)
 
-def pedir_tecla(teclas):
+def pedir_tecla(teclas, busqueda=None):
 	"""
 	Recibe una diccionario cuyas claves son las teclas válidas y sus valores son
 	las acciones correspondientes a las teclas. Espera que el usuario presione una 
 	tecla. Devuelve la acción que le corresponde a la tecla presionada. 
+	Si hay una búsqueda en curso, revisa las teclas periódicamente en lugar de
+	bloquearse, y si la búsqueda termina antes devuelve 'BUSQUEDA_TERMINADA'.
 	"""
+	if busqueda is not None:
+		return pedir_tecla_buscando(teclas, busqueda)
 	ev = gamelib.wait(gamelib.EventType.KeyPress)
 	if not ev:
 		return SALIR
@@ -98,153 +52,136 @@ def pedir_tecla(teclas):
 	accion = teclas.get(tecla_presionada, CONTINUAR)
 	return accion
 
-
-
-def buscar_solucion(estado_inicial):
+def pedir_tecla_buscando(teclas, busqueda):
 	"""
-	Recibe el estado del juego y busca una solución al mismo.
-	Si encuentra una solución devuelve True y una lista con los
-	movimientos de dicha solución. Caso contrario, devuelve False
-	y None.
+	Recibe el diccionario de teclas y la búsqueda en curso. Revisa las teclas
+	presionadas FPS_ESPERA veces por segundo hasta que se presione una o
+	termine la búsqueda. Devuelve la acción correspondiente, o 'CONTINUAR'
+	si la búsqueda avanzó, para que se vuelva a dibujar su progreso.
 	"""
-	visitados = set()
-	return backtrack(estado_inicial, visitados)
+	while gamelib.loop(fps=FPS_ESPERA):
+		for ev in gamelib.get_events():
+			if ev.type == gamelib.EventType.KeyPress:
+				return teclas.get(ev.key, CONTINUAR)
+		if busqueda.termino():
+			return BUSQUEDA_TERMINADA
+		if busqueda.hay_progreso_nuevo():
+			return CONTINUAR
+	return SALIR
 
-def agregar(visitados, estado):
-	"""
-	Recibe un diccionario con los estados visitados y el estado actual.
-	Devuelve ese mismo diccionario con el estado agregado.
-	"""
-	visitados.add(estado)
 
-def pertenece(visitados, nuevo_estado):
-	"""
-	Recibe un diccionario con los estados visitados y el estado actual.
-	Si el estado actual se encuentra dentro de los visitados devuelve True.
-	Caso contrario, False.
-	"""
-	return nuevo_estado in visitados
 
-def concatenar(direccion, acciones):
-	"""
-	Recibe la nueva dirección y las direcciones anteriores.
-	Concatena esta nueva dirección a las direcciones anteriores,
-	devolviendo el resultado de dicha acción.
+def encontrar_solucion(busqueda, sesion, cache):
 	"""
-	acciones.apilar(direccion)
-	return acciones
-
-def backtrack(estado, visitados):
+	Recibe la búsqueda terminada, la sesión de pistas y el cache de soluciones.
+	En caso de que no haya solución no realiza cambios. En cambio, si se encontró
+	una solución, la guarda en el cache y la carga como plan de la sesión.
+	Devuelve el resultado de la búsqueda: True, False si demostró que no hay
+	solución o None si no llegó a saberlo.
 	"""
-	Recibe el estado actual y una lista de los estados visitados.
-	Si en dicho estado el juego está ganado, devuelve True y una lista
-	vacía. Caso contrario, analiza las posibles direcciones del jugador
-	llamando recursivamente a esta función en cada una de las direcciones.
-	Si en alguna de las direcciones se encuentra una solución, devuelve True
-	y una pila de las acciones realizadas. En caso de que el juego no 
-	se pueda solucionar devuelve False y None.
-	"""
-	direcciones = ((0, -1), (0, 1), (1, 0), (-1, 0))
-	agregar(visitados, str(estado))
-	if soko.juego_ganado(estado):
-		return True, Pila()
-	for direccion in direcciones:
-		nuevo_estado = soko.mover(estado, direccion)
-		if pertenece(visitados, str(nuevo_estado)):
-			continue
-		solución_encontrada, acciones = backtrack(nuevo_estado, visitados)
-		if solución_encontrada:
-			return True, concatenar(direccion, acciones)
-	return False, None
-
-
-
-def encontrar_solucion(grilla, solucion):
-	"""
-	Recibe la grilla actual y la pila 'solución' (la cual se encuentra vacía).
-	Busca la solución. En caso de que no haya solución no realiza cambios. En cambio,
-	si encuentra una solución, apila cada uno de los movimientos a 'solución'.
-	"""
-	hay_solucion, movimientos = buscar_solucion(grilla)
-	gamelib.get_events() #elimina las teclas apretadas mientras se buscaba la solución
+	hay_solucion, movimientos = busqueda.resultado()
 	if hay_solucion:
-		pila_auxiliar = Pila()
+		direcciones = []
 		while not movimientos.esta_vacia():
-			pila_auxiliar.apilar(movimientos.desapilar())
-		while not pila_auxiliar.esta_vacia():
-			solucion.apilar(pila_auxiliar.desapilar())
+			direcciones.append(movimientos.desapilar())
+		cache.guardar(busqueda.grilla, direcciones)
+		sesion.cargar(direcciones)
+	return hay_solucion
 
-def obtener_pista(solucion):
+def guardar_repeticion(archivo_repeticiones, nivel, movimientos_realizados):
 	"""
-	Recibe la pila 'solución' y devuelve la dirección correspondiente
-	al próximo movimiento.
+	Recibe la ruta del archivo de repeticiones, el nivel actual y el historial
+	de movimientos realizados. Si hay movimientos, agrega la partida del nivel
+	al archivo de repeticiones. Se llama al ganar el nivel, al reiniciarlo y al
+	terminar el juego (por cualquier motivo) a mitad de un nivel, así que no
+	se pierde ningún intento.
 	"""
-	direccion = solucion.desapilar() 
-	return direccion
+	if len(movimientos_realizados):
+		repeticiones.guardar(archivo_repeticiones, nivel, movimientos_realizados.lurd())
 
-def obtener_grilla_anterior(movimientos_realizados):
+def dibujar_pensando(renderizador, grilla, busqueda):
 	"""
-	Recibe los movimientos realizados y devuelve la grilla correspondiente
-	al estado de juego anterior.
+	Dibuja en pantalla la grilla y la frase 'Pensando...' junto con la cantidad
+	de estados que lleva revisados la búsqueda.
 	"""
-	grilla = movimientos_realizados.desapilar()
-	return grilla
-
-def guardar_movimiento(movimientos_realizados, grilla):
-	"""Recibe los movimientos realizados y apila la grilla actual"""
-	movimientos_realizados.apilar(grilla)
+	texto = f"Pensando... ({busqueda.progreso} estados)" if busqueda.progreso else "Pensando..."
+	dibujar_grilla(renderizador, grilla, (texto, 5, 3))
 
-def dibujar_pensando(grilla):
-	"""Dibuja en pantalla la grilla y la frase 'Pensando...'"""
-	gamelib.draw_begin()
-	dibujar_grilla(grilla)
-	gamelib.draw_text("Pensando...", 55, 10)
-	gamelib.draw_end()
-
-def dibujar_pista_disponible(grilla):
+def dibujar_pista_disponible(renderizador, grilla):
 	"""Dibuja en pantalla la grilla y la frase 'Pista disponible'"""
-	gamelib.draw_begin()
-	dibujar_grilla(grilla)
-	gamelib.draw_text("Pista disponible", 70, 10)
-	gamelib.draw_end()
-
-
-
-def manejar_solucion(grilla, accion, solucion, movimientos_validos):
-	"""
-	Recibe la grilla, la pila 'solucion', la accion y los movimientos válidos.
-	Si la accion es 'SOLUCION', en caso de que ya haya una solución, obtiene
-	una pista. Si no hay solución, la busca. Además, si la accion no es SOLUCION
-	pero la accion anterior sí, borra la solución encontrada. Devuelve la pila
-	'solución' y la acción.
-	"""
-	if accion == SOLUCION:
-		if solucion.esta_vacia():
-			dibujar_pensando(grilla)
-			try:
-				encontrar_solucion(grilla, solucion)
-			except RecursionError:
-				accion = CONTINUAR
-				return solucion, accion
-			if not solucion.esta_vacia():
-				accion = CONTINUAR
+	dibujar_grilla(renderizador, grilla, ("Pista disponible", 5, 3))
+
+def dibujar_sin_pista(renderizador, grilla):
+	"""Dibuja en pantalla la grilla y la frase 'No se encontró una pista'"""
+	dibujar_grilla(renderizador, grilla, ("No se encontró una pista", 5, 3))
+
+
+
+def manejar_solucion(grilla, accion, sesion, movimientos_validos, busqueda, cache):
+	"""
+	Recibe la grilla, la accion, la sesión de pistas, los movimientos válidos, la
+	búsqueda en curso (o None) y el cache de soluciones. Si la accion es 'SOLUCION',
+	en caso de que ya haya un plan, obtiene una pista. Si no hay plan, busca la
+	solución en el cache y, si no está, empieza a buscarla en segundo plano. Cuando
+	la búsqueda termina, carga la solución encontrada como plan; si demostró que el
+	nivel no tiene solución, lo reinicia, y si se abandonó sin saberlo, avisa que no
+	encontró una pista. Si se vuelve a pedir la solución mientras se busca, la
+	búsqueda se cancela.
+	Además, si el jugador se mueve siguiendo el plan se conserva el resto del plan;
+	si se aparta de él, deshace o reinicia, el plan se descarta. Si el jugador se
+	mueve, deshace o reinicia mientras se busca, cancela la búsqueda. Devuelve la
+	acción y la búsqueda en curso.
+	"""
+	if accion == BUSQUEDA_TERMINADA:
+		hay_solucion = encontrar_solucion(busqueda, sesion, cache)
+		busqueda = None
+		if sesion.hay_pista():
+			accion = CONTINUAR
+		elif hay_solucion is False:
+			accion = REINICIAR #si no hay solución, reinicia el nivel
+		else:
+			sesion.no_encontrada()
+			accion = CONTINUAR
+	elif accion == SOLUCION:
+		if busqueda is not None:
+			busqueda.cancelar()
+			busqueda = None
+			accion = CONTINUAR
+		elif not sesion.hay_pista():
+			direcciones = cache.buscar(grilla)
+			if direcciones is None:
+				busqueda = BusquedaEnSegundoPlano(grilla, sesion.semilla)
 			else:
-				accion = REINICIAR #si no hay solución, reinicia el nivel
+				sesion.cargar(direcciones)
+			accion = CONTINUAR
 		else:
-			movimientos_validos[SOLUCION] = obtener_pista(solucion)
-	elif not solucion.esta_vacia():
-		solucion = Pila()
-	return solucion, accion
+			movimientos_validos[SOLUCION] = sesion.pista()
+	elif accion != CONTINUAR:
+		if busqueda is not None:
+			busqueda.cancelar()
+			busqueda = None
+		movimiento = movimientos_validos.get(accion)
+		if movimiento is None:
+			sesion.descartar()
+		elif soko.mover(grilla, movimiento) != grilla:
+			sesion.seguir(movimiento)
+	return accion, busqueda
 
 def manejar_deshacer(grilla, movimientos_realizados):
 	"""
-	Recibe la grilla y los movimientos realizados. Si hay movimientos
-	anteriormente realizados, obtiene la grilla inmediatamente anterior 
-	y la devuelve. Caso contrario, devuelve la misma grilla recibida.
+	Recibe la grilla y el historial de movimientos realizados. Si hay movimientos
+	anteriormente realizados, deshace el último y devuelve la grilla
+	inmediatamente anterior. Caso contrario, devuelve la misma grilla recibida.
 	"""
-	if not movimientos_realizados.esta_vacia():
-		grilla = obtener_grilla_anterior(movimientos_realizados)
-	return grilla
+	return movimientos_realizados.deshacer(grilla)
+
+def manejar_rehacer(grilla, movimientos_realizados):
+	"""
+	Recibe la grilla y el historial de movimientos realizados. Si hay movimientos
+	deshechos, rehace el último y devuelve la grilla resultante. Caso contrario,
+	devuelve la misma grilla recibida.
+	"""
+	return movimientos_realizados.rehacer(grilla)
 
 def manejar_reiniciar(grilla, movimientos_realizados, nivel, niveles):
 	"""
@@ -253,65 +190,90 @@ def manejar_reiniciar(grilla, movimientos_realizados, nivel, niveles):
 	'limpia' los movimientos realizados.
 	"""
 	grilla = obtener_grilla(nivel, niveles)
-	movimientos_realizados = Pila()
+	movimientos_realizados = Historial(grilla)
 	return grilla, movimientos_realizados
 
 def manejar_otro_caso(grilla, accion, movimientos_validos, movimientos_realizados):
 	"""
 	Recibe la grilla, la acción, los movimientos válidos, los movimientos realizados.
 	Devuelve la grilla correspodiente luego de realizar la accion obtenida. Además,
-	si la grilla recibida es distinta de la nueva grilla, guarda ese estado en los 
-	movimientos realizados.
+	si la grilla recibida es distinta de la nueva grilla, registra el movimiento en
+	el historial de movimientos realizados.
 	"""
-	grilla_anterior = grilla
 	movimiento = movimientos_validos[accion]
-	grilla = soko.mover(grilla, movimiento)
-	if not grilla_anterior == grilla:
-		guardar_movimiento(movimientos_realizados, grilla_anterior)
-	return grilla
+	return movimientos_realizados.mover(grilla, movimiento)
 
-def manejar_accion(grilla, accion, solucion, movimientos_realizados, nivel, niveles):
+def manejar_accion(grilla, accion, sesion, movimientos_realizados, nivel, niveles, busqueda, cache):
 	"""
-	Recibe la grilla, la accion, la pila 'solucion', los movimientos realizados, el nivel
-	actual y la lista de niveles. Según la accion recibida realiza acciones pertinentes.
-	Devuelve la grilla, la accion, la pila 'solucion' y los movimientos realizados.
+	Recibe la grilla, la accion, la sesión de pistas, los movimientos realizados, el nivel
+	actual, la lista de niveles, la búsqueda en curso y el cache de soluciones. Según la
+	accion recibida realiza acciones pertinentes. Devuelve la grilla, la accion, los
+	movimientos realizados y la búsqueda en curso.
 	"""
 	movimientos_validos = {"NORTE": (0, -1), "SUR": (0, 1), "ESTE": (1, 0), "OESTE": (-1, 0), "CONTINUAR": (0,0)}
-	solucion, accion = manejar_solucion(grilla, accion, solucion, movimientos_validos)	
+	accion, busqueda = manejar_solucion(grilla, accion, sesion, movimientos_validos, busqueda, cache)
 	if accion == DESHACER:
 		grilla = manejar_deshacer(grilla, movimientos_realizados)
+	elif accion == REHACER:
+		grilla = manejar_rehacer(grilla, movimientos_realizados)
 	elif accion == REINICIAR:
 		grilla, movimientos_realizados = manejar_reiniciar(grilla, movimientos_realizados, nivel, niveles)
 	else:
 		grilla = manejar_otro_caso(grilla, accion, movimientos_validos, movimientos_realizados)
-	return grilla, accion, solucion, movimientos_realizados
+	return grilla, accion, movimientos_realizados, busqueda
 
 
 
-def main():
-	niveles = copiar_niveles("niveles.txt")
+def main(archivo_repeticiones=repeticiones.ARCHIVO_REPETICIONES, archivo_niveles=ARCHIVO_NIVELES):
+	niveles = abrir_paquete(archivo_niveles)
+	cache = CacheSoluciones(ruta_cache(archivo_niveles))
 	teclas = copiar_teclas("teclas.txt")
 	nivel = 0
-	movimientos_realizados = Pila()
-	solucion = Pila()
+	sesion = SesionPista()
+	renderizador = Renderizador(DIMENSION_CELDA)
+	busqueda = None
 	grilla = obtener_grilla(nivel, niveles)
-	while gamelib.is_alive():
-		if soko.juego_ganado(grilla):
-			gamelib.play_sound('win_sound.wav')
-			movimientos_realizados = Pila()
-			if nivel == len(niveles):
-				gamelib.say("Ganaste!")
+	movimientos_realizados = Historial(grilla)
+	sesion.empezar_nivel(niveles.nivel(nivel))
+	try:
+		while gamelib.is_alive():
+			if soko.juego_ganado(grilla):
+				gamelib.play_sound('win_sound.wav')
+				guardar_repeticion(archivo_repeticiones, nivel, movimientos_realizados)
+				if nivel == len(niveles):
+					gamelib.say("Ganaste!")
+					break
+				nivel += 1
+				grilla = obtener_grilla(nivel, niveles)
+				movimientos_realizados = Historial(grilla)
+				sesion.empezar_nivel(niveles.nivel(nivel))
+			gamelib.title(f"Sokoban Nivel {nivel}")
+			if sesion.hay_pista():
+				dibujar_pista_disponible(renderizador, grilla)
+			elif busqueda is not None:
+				dibujar_pensando(renderizador, grilla, busqueda)
+			elif sesion.sin_pista:
+				dibujar_sin_pista(renderizador, grilla)
+			else:
+				dibujar_grilla(renderizador, grilla)
+			accion = pedir_tecla(teclas, busqueda)
+			if accion == SALIR:
 				break
-			nivel += 1
-			grilla = obtener_grilla(nivel, niveles)
-		gamelib.title(f"Sokoban Nivel {nivel}")
-		dibujar_grilla(grilla)
-		if not solucion.esta_vacia():
-			dibujar_pista_disponible(grilla)
-		accion = pedir_tecla(teclas)
-		if accion == SALIR:
-			break
-		grilla, accion, solucion, movimientos_realizados = manejar_accion(grilla, accion, solucion, movimientos_realizados, nivel, niveles)
-
-
-gamelib.init(main)
+			anteriores = movimientos_realizados
+			grilla, accion, movimientos_realizados, busqueda = manejar_accion(grilla, accion, sesion, movimientos_realizados, nivel, niveles, busqueda, cache)
+			if movimientos_realizados is not anteriores:
+				guardar_repeticion(archivo_repeticiones, nivel, anteriores)
+	finally:
+		if not soko.juego_ganado(grilla):
+			guardar_repeticion(archivo_repeticiones, nivel, movimientos_realizados)
+		cache.cerrar()
+		niveles.cerrar()
+		cerrar_procesos()
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Juego de Sokoban.")
+	parser.add_argument("--niveles", default=ARCHIVO_NIVELES, help="archivo de niveles (de texto o un paquete binario .sokb)")
+	parser.add_argument("--repeticiones", default=repeticiones.ARCHIVO_REPETICIONES, help="archivo donde se agregan las partidas jugadas")
+	args = parser.parse_args()
+	gamelib.init(main, [args.repeticiones, args.niveles])
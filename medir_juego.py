@@ -0,0 +1,135 @@
+"""
+Mide el ciclo completo del juego (main.main) sin ventana, con la ventana
+fuera de pantalla de gamelib (gamelib.init_headless). Le envía al juego una
+secuencia de teclas y mide cuántos eventos por segundo procesa y la latencia
+de cada uno: el tiempo desde que el juego recibe la tecla hasta que termina
+de dibujar el cuadro siguiente. Las teclas son un recorrido al azar (con
+una semilla fija, así que siempre es el mismo) o, con --repeticiones, las
+partidas ganadas de un archivo de repeticiones, nivel por nivel desde el
+primero. Las partidas que juega el juego durante la medición no se guardan.
+
+Ejemplos:
+
+	python medir_juego.py
+	python medir_juego.py --eventos 5000 --ppm
+	python medir_juego.py --repeticiones repeticiones.txt
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import gamelib
+import main as juego
+import repeticiones
+from estado import LETRAS, desde_lurd
+
+EVENTOS = 2000
+SEMILLA = 1
+TECLAS_AL_AZAR = ("Up", "Down", "Left", "Right") * 6 + ("z", "y", "r")
+TECLAS_DIRECCIONES = {"u": "Up", "d": "Down", "l": "Left", "r": "Right"}
+
+def teclas_al_azar(cantidad, semilla):
+	"""Devuelve una lista de 'cantidad' teclas al azar, terminada con la de salir."""
+	azar = random.Random(semilla)
+	return [azar.choice(TECLAS_AL_AZAR) for _ in range(cantidad)] + ["Escape"]
+
+def teclas_de_repeticiones(ruta):
+	"""
+	Recibe un archivo de repeticiones y devuelve la lista de teclas que juega
+	la primera partida ganada de cada nivel, desde el nivel 0 y mientras haya
+	una partida ganada del nivel siguiente, terminada con la de salir.
+	"""
+	niveles = juego.abrir_paquete(juego.ARCHIVO_NIVELES)
+	ganadas = {}
+	lineas = list(repeticiones.leer(ruta))
+	for verificacion, (_, texto) in zip(repeticiones.verificar_repeticiones(niveles, lineas), lineas):
+		if verificacion["resultado"] == repeticiones.GANADA:
+			ganadas.setdefault(verificacion["nivel"], repeticiones.interpretar(texto)[1])
+	niveles.cerrar()
+	teclas = []
+	nivel = 0
+	while nivel in ganadas:
+		teclas.extend(TECLAS_DIRECCIONES[LETRAS[direccion]] for direccion in desde_lurd(ganadas[nivel]))
+		nivel += 1
+	return teclas + ["Escape"]
+
+class Medicion:
+	"""
+	Representa la medición de una partida: registra cuándo se entrega cada
+	evento y cuándo termina cada cuadro, y opcionalmente dibuja cada cuadro
+	en un PPM en memoria.
+	"""
+
+	def __init__(self, ppm=False):
+		"""Crea una medición vacía."""
+		self.ppm = ppm
+		self.pendiente = None
+		self.latencias = []
+		self.eventos = 0
+
+	def evento(self, evento):
+		"""Registra que se entregó un evento al juego."""
+		self.eventos += 1
+		self.pendiente = time.perf_counter()
+
+	def cuadro(self, ventana):
+		"""Registra que el juego terminó de dibujar un cuadro."""
+		if self.ppm:
+			ventana.to_ppm()
+		if self.pendiente is not None:
+			self.latencias.append(time.perf_counter() - self.pendiente)
+			self.pendiente = None
+
+def percentil(valores, p):
+	"""Devuelve el percentil p (entre 0 y 100) de la lista de valores ordenada."""
+	if not valores:
+		return 0
+	return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+def medir(teclas, ppm=False):
+	"""
+	Recibe la lista de teclas y si se dibujan los cuadros en PPM. Juega la
+	partida sin ventana y devuelve un diccionario con los resultados.
+	"""
+	medicion = Medicion(ppm)
+	inicio = time.perf_counter()
+	ventana = gamelib.init_headless(juego.main, [os.devnull], events=teclas, on_frame=medicion.cuadro, on_event=medicion.evento)
+	segundos = time.perf_counter() - inicio
+	latencias = sorted(medicion.latencias)
+	return {
+		"eventos": medicion.eventos,
+		"cuadros": ventana.frames,
+		"segundos": round(segundos, 3),
+		"eventos_por_segundo": round(medicion.eventos / segundos) if segundos else 0,
+		"latencia_p50_ms": round(percentil(latencias, 50) * 1000, 3),
+		"latencia_p95_ms": round(percentil(latencias, 95) * 1000, 3),
+		"latencia_p99_ms": round(percentil(latencias, 99) * 1000, 3),
+		"latencia_maxima_ms": round(percentil(latencias, 100) * 1000, 3),
+		"titulo_final": ventana.window_title,
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="Mide el ciclo completo del juego sin ventana.")
+	parser.add_argument("--eventos", type=int, default=EVENTOS, help="cantidad de teclas al azar")
+	parser.add_argument("--semilla", type=int, default=SEMILLA, help="semilla de las teclas al azar")
+	parser.add_argument("--repeticiones", default=None, help="archivo de repeticiones cuyas partidas ganadas se juegan en lugar de teclas al azar")
+	parser.add_argument("--ppm", action="store_true", help="dibuja cada cuadro en un PPM en memoria")
+	parser.add_argument("--salida", default=None, help="archivo JSON donde guardar los resultados")
+	args = parser.parse_args()
+
+	if args.repeticiones is None:
+		teclas = teclas_al_azar(args.eventos, args.semilla)
+	else:
+		teclas = teclas_de_repeticiones(args.repeticiones)
+	resultado = medir(teclas, args.ppm)
+	for clave, valor in resultado.items():
+		print(f"{clave:<22}{valor}")
+	if args.salida is not None:
+		with open(args.salida, "w") as archivo:
+			json.dump(resultado, archivo, indent=1)
+			archivo.write("\n")
+
+if __name__ == "__main__":
+	main()
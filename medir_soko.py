@@ -0,0 +1,116 @@
+"""
+Mide cuánto tarda cada primitiva del módulo soko (mover, juego_ganado,
+obtener_posicion_jugador y los predicados hay_*) en nanosegundos por llamada,
+sobre un nivel chico, uno mediano y uno grande de un archivo de niveles. No
+usa la ventana del juego.
+
+Ejemplos:
+
+	python medir_soko.py
+	python medir_soko.py --salida primitivas.json
+"""
+
+import argparse
+import json
+import timeit
+import soko
+from estado import DIRECCIONES
+from archivos import PaqueteNiveles
+
+PREDICADOS = ("hay_pared", "hay_objetivo", "hay_caja", "hay_jugador")
+TIEMPO_MINIMO = 0.2
+
+def elegir_niveles(niveles):
+	"""
+	Recibe los niveles y devuelve un diccionario con el índice del nivel más
+	chico, el mediano y el más grande según su cantidad de celdas.
+	"""
+	tamanios = sorted(range(len(niveles)), key=lambda i: len(niveles[i]) * len(niveles[i][0]))
+	return {
+		"chico": tamanios[0],
+		"mediano": tamanios[len(tamanios) // 2],
+		"grande": tamanios[-1],
+	}
+
+def operaciones(grilla):
+	"""
+	Recibe una grilla y devuelve un diccionario que asocia el nombre de cada
+	primitiva con una tupla: una función sin argumentos que la llama varias
+	veces y la cantidad de llamadas que hace.
+	"""
+	ancho, alto = soko.dimensiones(grilla)
+	celdas = [(c, f) for f in range(alto) for c in range(ancho)]
+
+	def mover():
+		for direccion in DIRECCIONES:
+			soko.mover(grilla, direccion)
+
+	resultado = {
+		"mover": (mover, len(DIRECCIONES)),
+		"juego_ganado": (lambda: soko.juego_ganado(grilla), 1),
+		"obtener_posicion_jugador": (lambda: soko.obtener_posicion_jugador(grilla), 1),
+	}
+	for nombre in PREDICADOS:
+		resultado[nombre] = (recorrer(getattr(soko, nombre), grilla, celdas), len(celdas))
+	return resultado
+
+def recorrer(predicado, grilla, celdas):
+	"""Devuelve una función sin argumentos que evalúa el predicado en todas las celdas."""
+	def funcion():
+		for c, f in celdas:
+			predicado(grilla, c, f)
+	return funcion
+
+def nanosegundos_por_llamada(funcion, llamadas, repeticiones):
+	"""
+	Recibe una función, la cantidad de llamadas a la primitiva que hace cada
+	vez y la cantidad de repeticiones. Devuelve los nanosegundos por llamada
+	de la repetición más rápida.
+	"""
+	temporizador = timeit.Timer(funcion)
+	veces, segundos = temporizador.autorange()
+	while segundos < TIEMPO_MINIMO:
+		veces *= 2
+		segundos = temporizador.timeit(veces)
+	mejor = min(temporizador.repeat(repeticiones, veces))
+	return mejor / (veces * llamadas) * 1e9
+
+def medir(niveles, repeticiones):
+	"""
+	Recibe los niveles y la cantidad de repeticiones. Devuelve una lista con
+	una medición por primitiva y tamaño de nivel.
+	"""
+	mediciones = []
+	for tamanio, indice in elegir_niveles(niveles).items():
+		grilla = soko.crear_grilla(niveles[indice])
+		ancho, alto = soko.dimensiones(grilla)
+		for primitiva, (funcion, llamadas) in operaciones(grilla).items():
+			mediciones.append({
+				"primitiva": primitiva,
+				"tamanio": tamanio,
+				"nivel": indice,
+				"celdas": ancho * alto,
+				"ns_por_llamada": round(nanosegundos_por_llamada(funcion, llamadas, repeticiones), 1),
+			})
+	return mediciones
+
+def main():
+	parser = argparse.ArgumentParser(description="Mide las primitivas del módulo soko en nanosegundos por llamada.")
+	parser.add_argument("--niveles", default="niveles.txt", help="archivo de niveles")
+	parser.add_argument("--repeticiones", type=int, default=5, help="repeticiones por medición (se toma la más rápida)")
+	parser.add_argument("--salida", default=None, help="archivo JSON donde guardar las mediciones")
+	args = parser.parse_args()
+
+	paquete = PaqueteNiveles(args.niveles)
+	mediciones = medir(paquete, args.repeticiones)
+	paquete.cerrar()
+	print(f"{'primitiva':<26}{'tamaño':<9}{'celdas':>7}{'ns/llamada':>12}")
+	for medicion in mediciones:
+		print(f"{medicion['primitiva']:<26}{medicion['tamanio']:<9}{medicion['celdas']:>7}{medicion['ns_por_llamada']:>12}")
+	if args.salida is not None:
+		with open(args.salida, "w") as archivo:
+			json.dump(mediciones, archivo, indent=1)
+			archivo.write("\n")
+
+if __name__ == "__main__":
+	main()
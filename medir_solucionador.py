@@ -0,0 +1,163 @@
+"""
+Mide el rendimiento del solucionador sobre un subconjunto fijo de niveles y
+lo compara con una medición base guardada. Por cada nivel registra los
+estados expandidos, los estados por segundo, la memoria máxima, la longitud
+de la solución y el tiempo, y los escribe en un archivo JSON. Si algún nivel
+empeora respecto de la base más allá de la tolerancia, lo informa y termina
+con código de salida 1, así que sirve para controlar los cambios al
+solucionador. Los tiempos y la memoria dependen de la máquina, así que la
+base debe tomarse en la misma máquina en la que se controla.
+
+Ejemplos:
+
+	python medir_solucionador.py
+	python medir_solucionador.py --actualizar-base
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+from archivos import PaqueteNiveles
+from resolver import resolver_nivel, limitar_memoria, MEMORIA_POR_NIVEL
+from backtracking import LIMITE_NODOS, MOVIMIENTOS, EMPUJES, BIDIRECCIONAL
+
+NIVELES = (5, 9, 15, 34, 35, 58, 77, 100, 123, 140)
+TIEMPO_POR_NIVEL = 120
+ARCHIVO_BASE = "rendimiento_base.json"
+ARCHIVO_SALIDA = "rendimiento.json"
+TOLERANCIA_TIEMPO = 0.5
+TOLERANCIA_MEMORIA = 0.25
+
+def memoria_maxima():
+	"""
+	Devuelve la memoria máxima usada por el proceso actual, en megabytes, o
+	None en los sistemas que no permiten consultarla.
+	"""
+	try:
+		import resource
+	except ImportError:
+		return None
+	maxima = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if sys.platform == "darwin":
+		return round(maxima / (1024 * 1024), 1)
+	return round(maxima / 1024, 1)
+
+def medir_nivel(argumentos):
+	"""
+	Recibe los mismos argumentos que resolver.resolver_nivel. Resuelve el
+	nivel y devuelve su medición: el resultado de resolver_nivel (sin la
+	solución) más la memoria máxima del proceso.
+	"""
+	resultado = resolver_nivel(argumentos)
+	del resultado["solucion"]
+	resultado["memoria_mb"] = memoria_maxima()
+	return resultado
+
+def medir(niveles, indices, repeticiones, segundos, limite_nodos, megabytes, modo=EMPUJES):
+	"""
+	Recibe la lista de niveles, los índices a medir, los límites de la
+	búsqueda y el modo de búsqueda. Resuelve cada nivel 'repeticiones' veces,
+	cada vez en un proceso nuevo para que la memoria de un nivel no afecte al
+	siguiente, y devuelve la lista de mediciones, quedándose con la más rápida
+	de cada nivel.
+	"""
+	mediciones = []
+	with multiprocessing.Pool(1, initializer=limitar_memoria, initargs=(megabytes,), maxtasksperchild=1) as grupo:
+		for indice in indices:
+			tareas = [(indice, niveles[indice], segundos, limite_nodos, megabytes, None, modo)] * repeticiones
+			medicion = min(grupo.map(medir_nivel, tareas, chunksize=1), key=lambda resultado: resultado["segundos"])
+			print(f"Nivel {indice}: {medicion['expandidos']} expandidos, {medicion['segundos']} s, {medicion['memoria_mb']} MB", flush=True)
+			mediciones.append(medicion)
+	return mediciones
+
+def comparar(mediciones, base, tolerancia_tiempo, tolerancia_memoria):
+	"""
+	Recibe las mediciones actuales y las de la base. Devuelve la lista de
+	regresiones encontradas, cada una como un texto que la describe. Los
+	estados expandidos y la longitud de la solución no dependen de la máquina,
+	así que cualquier aumento es una regresión; el tiempo y la memoria sólo
+	cuentan si empeoran más que la tolerancia.
+	"""
+	anteriores = {medicion["nivel"]: medicion for medicion in base}
+	regresiones = []
+	for medicion in mediciones:
+		nivel = medicion["nivel"]
+		anterior = anteriores.get(nivel)
+		if anterior is None:
+			continue
+		if anterior["resuelto"] and not medicion["resuelto"]:
+			regresiones.append(f"Nivel {nivel}: ya no se resuelve")
+			continue
+		if not medicion["resuelto"]:
+			continue
+		if anterior["resuelto"] and medicion["movimientos"] > anterior["movimientos"]:
+			regresiones.append(f"Nivel {nivel}: la solución pasó de {anterior['movimientos']} a {medicion['movimientos']} movimientos")
+		if anterior["expandidos"] and medicion["expandidos"] > anterior["expandidos"]:
+			regresiones.append(f"Nivel {nivel}: los estados expandidos pasaron de {anterior['expandidos']} a {medicion['expandidos']}")
+		if medicion["segundos"] > anterior["segundos"] * (1 + tolerancia_tiempo) and medicion["segundos"] - anterior["segundos"] > 0.05:
+			regresiones.append(f"Nivel {nivel}: el tiempo pasó de {anterior['segundos']} s a {medicion['segundos']} s")
+		if anterior["memoria_mb"] and medicion["memoria_mb"] and medicion["memoria_mb"] > anterior["memoria_mb"] * (1 + tolerancia_memoria):
+			regresiones.append(f"Nivel {nivel}: la memoria pasó de {anterior['memoria_mb']} MB a {medicion['memoria_mb']} MB")
+	return regresiones
+
+def guardar(ruta, mediciones, args):
+	"""Guarda en la ruta recibida las mediciones y los parámetros con que se tomaron."""
+	datos = {
+		"python": platform.python_version(),
+		"maquina": platform.machine(),
+		"modo": args.modo,
+		"limite_nodos": args.nodos,
+		"repeticiones": args.repeticiones,
+		"niveles": mediciones,
+	}
+	with open(ruta, "w") as archivo:
+		json.dump(datos, archivo, indent=1)
+		archivo.write("\n")
+
+def main():
+	parser = argparse.ArgumentParser(description="Mide el rendimiento del solucionador y lo compara con una medición base.")
+	parser.add_argument("--niveles", default="niveles.txt", help="archivo de niveles")
+	parser.add_argument("--indices", type=int, nargs="+", default=NIVELES, help="índices de los niveles a medir")
+	parser.add_argument("--repeticiones", type=int, default=3, help="veces que se resuelve cada nivel (se toma la más rápida)")
+	parser.add_argument("--tiempo", type=float, default=TIEMPO_POR_NIVEL, help="segundos máximos por nivel")
+	parser.add_argument("--nodos", type=int, default=LIMITE_NODOS, help="estados máximos a expandir por nivel")
+	parser.add_argument("--memoria", type=int, default=MEMORIA_POR_NIVEL, help="megabytes máximos por nivel")
+	parser.add_argument("--modo", default=EMPUJES, choices=(EMPUJES, BIDIRECCIONAL, MOVIMIENTOS), help="modo de búsqueda (la base debe haberse tomado en el mismo modo)")
+	parser.add_argument("--salida", default=ARCHIVO_SALIDA, help="archivo JSON con las mediciones")
+	parser.add_argument("--base", default=ARCHIVO_BASE, help="archivo JSON con la medición base")
+	parser.add_argument("--tolerancia-tiempo", type=float, default=TOLERANCIA_TIEMPO, help="aumento relativo de tiempo tolerado")
+	parser.add_argument("--tolerancia-memoria", type=float, default=TOLERANCIA_MEMORIA, help="aumento relativo de memoria tolerado")
+	parser.add_argument("--actualizar-base", action="store_true", help="guarda las mediciones como nueva base en lugar de compararlas")
+	args = parser.parse_args()
+
+	base = None
+	if not args.actualizar_base:
+		try:
+			with open(args.base) as archivo:
+				base = json.load(archivo)
+		except FileNotFoundError:
+			print(f"No hay medición base en {args.base}; usar --actualizar-base para crearla")
+		if base is not None and base.get("modo", EMPUJES) != args.modo:
+			sys.exit(f"La base {args.base} se tomó en el modo {base.get('modo', EMPUJES)} y no se puede comparar con el modo {args.modo}")
+
+	paquete = PaqueteNiveles(args.niveles)
+	mediciones = medir(paquete, args.indices, args.repeticiones, args.tiempo, args.nodos, args.memoria, args.modo)
+	paquete.cerrar()
+	guardar(args.salida, mediciones, args)
+	if args.actualizar_base:
+		guardar(args.base, mediciones, args)
+		print(f"Base actualizada en {args.base}")
+		return
+	if base is None:
+		return
+	regresiones = comparar(mediciones, base["niveles"], args.tolerancia_tiempo, args.tolerancia_memoria)
+	for regresion in regresiones:
+		print(regresion)
+	if regresiones:
+		sys.exit(1)
+	print(f"Sin regresiones respecto de {args.base}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,154 @@
+"""
+Formato binario compacto para paquetes de niveles. Un paquete binario empieza
+con un encabezado y una tabla con la posición en bytes de cada nivel, así que
+leer un nivel es un salto y una lectura chica, sin interpretar texto. Cada
+nivel guarda sus dimensiones, sus celdas codificadas de a dos por byte y los
+datos estáticos que el solucionador calcularía al empezar: las casillas
+muertas y la lista de objetivos.
+
+Para convertir un archivo de niveles de texto:
+
+	python paquete_binario.py niveles.txt niveles.sokb
+"""
+
+import argparse
+import mmap
+import struct
+import estado
+import bloqueos
+import heuristica
+from archivos import PaqueteNiveles
+
+MAGIA = b"SOKB"
+VERSION = 1
+EXTENSION = ".sokb"
+ENCABEZADO = struct.Struct("<4sHHI")
+POSICION = struct.Struct("<Q")
+DIMENSIONES = struct.Struct("<HHH")
+OBJETIVO = struct.Struct("<H")
+CELDAS = " #$@.*+"
+CODIGOS = {celda: codigo for codigo, celda in enumerate(CELDAS)}
+PARES = [CELDAS[byte & 0xF] + CELDAS[byte >> 4] if max(byte & 0xF, byte >> 4) < len(CELDAS) else "??" for byte in range(256)]
+
+class PaqueteBinario:
+	"""
+	Representa un paquete binario de niveles abierto. Se mapea en memoria y
+	cada nivel se decodifica recién cuando se lo pide. Se usa igual que un
+	archivos.PaqueteNiveles.
+	"""
+
+	def __init__(self, ruta_archivo):
+		"""Abre el paquete binario guardado en la ruta recibida."""
+		with open(ruta_archivo, "rb") as archivo:
+			self.mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+		if len(self.mapa) < ENCABEZADO.size:
+			self.cerrar()
+			raise ValueError(f"{ruta_archivo} no es un paquete binario de niveles")
+		magia, version, _, self.cantidad = ENCABEZADO.unpack_from(self.mapa)
+		if magia != MAGIA or version != VERSION:
+			self.cerrar()
+			raise ValueError(f"{ruta_archivo} no es un paquete binario de niveles (versión {VERSION})")
+
+	def __len__(self):
+		return self.cantidad
+
+	def __getitem__(self, indice):
+		"""Devuelve el nivel de la posición recibida, como lista de filas."""
+		ancho, alto, _, inicio = self.leer_dimensiones(indice)
+		texto = "".join(map(PARES.__getitem__, self.mapa[inicio:inicio + largo_celdas(ancho, alto)]))
+		return [texto[f * ancho:(f + 1) * ancho] for f in range(alto)]
+
+	def nivel(self, indice):
+		"""
+		Devuelve el nivel (de estado.Nivel) de la posición recibida, con las
+		casillas muertas y la lista de objetivos ya cargadas desde el paquete.
+		"""
+		nivel = estado.desde_grilla(self[indice]).nivel
+		ancho, alto, cantidad_objetivos, inicio = self.leer_dimensiones(indice)
+		inicio += largo_celdas(ancho, alto)
+		fin = inicio + largo_mascara(ancho, alto)
+		nivel.datos["muertas"] = int.from_bytes(self.mapa[inicio:fin], "little")
+		nivel.datos["objetivos"] = [OBJETIVO.unpack_from(self.mapa, fin + k * OBJETIVO.size)[0] for k in range(cantidad_objetivos)]
+		return nivel
+
+	def leer_dimensiones(self, indice):
+		"""
+		Devuelve el ancho, el alto y la cantidad de objetivos del nivel de la
+		posición recibida, y la posición en bytes donde empiezan sus celdas.
+		"""
+		if not 0 <= indice < self.cantidad:
+			raise IndexError("no existe el nivel")
+		inicio, = POSICION.unpack_from(self.mapa, ENCABEZADO.size + indice * POSICION.size)
+		ancho, alto, cantidad_objetivos = DIMENSIONES.unpack_from(self.mapa, inicio)
+		return ancho, alto, cantidad_objetivos, inicio + DIMENSIONES.size
+
+	def cerrar(self):
+		"""Cierra el paquete."""
+		self.mapa.close()
+
+def abrir_paquete(ruta_archivo):
+	"""
+	Abre el paquete de niveles de la ruta recibida: un PaqueteBinario si tiene
+	la extensión EXTENSION y un archivos.PaqueteNiveles de texto si no.
+	"""
+	if ruta_archivo.endswith(EXTENSION):
+		return PaqueteBinario(ruta_archivo)
+	return PaqueteNiveles(ruta_archivo)
+
+def largo_celdas(ancho, alto):
+	"""Devuelve cuántos bytes ocupan las celdas de un nivel de las dimensiones recibidas."""
+	return (ancho * alto + 1) // 2
+
+def largo_mascara(ancho, alto):
+	"""Devuelve cuántos bytes ocupa una máscara de celdas de un nivel de las dimensiones recibidas."""
+	return (ancho * alto + 7) // 8
+
+def codificar_nivel(grilla):
+	"""Recibe una grilla y devuelve los bytes con los que se guarda en un paquete binario."""
+	nivel = estado.desde_grilla(grilla).nivel
+	ancho, alto = nivel.ancho, nivel.alto
+	codigos = [CODIGOS[celda] for fila in grilla for celda in fila]
+	if len(codigos) % 2:
+		codigos.append(CODIGOS[" "])
+	celdas = bytes(codigos[k] | codigos[k + 1] << 4 for k in range(0, len(codigos), 2))
+	muertas = bloqueos.casillas_muertas(nivel).to_bytes(largo_mascara(ancho, alto), "little")
+	destinos = heuristica.objetivos(nivel)
+	objetivos = b"".join(OBJETIVO.pack(objetivo) for objetivo in destinos)
+	return DIMENSIONES.pack(ancho, alto, len(destinos)) + celdas + muertas + objetivos
+
+def convertir(ruta_texto, ruta_binaria):
+	"""
+	Recibe la ruta de un archivo de niveles de texto y la ruta del paquete
+	binario a crear. Escribe el paquete binario y devuelve la cantidad de
+	niveles convertidos.
+	"""
+	paquete = PaqueteNiveles(ruta_texto)
+	cantidad = len(paquete)
+	with open(ruta_binaria, "wb") as archivo:
+		archivo.write(ENCABEZADO.pack(MAGIA, VERSION, 0, cantidad))
+		posicion = ENCABEZADO.size + cantidad * POSICION.size
+		archivo.seek(posicion)
+		posiciones = []
+		for i in range(cantidad):
+			datos = codificar_nivel(paquete[i])
+			posiciones.append(posicion)
+			archivo.write(datos)
+			posicion += len(datos)
+		archivo.seek(ENCABEZADO.size)
+		archivo.write(b"".join(POSICION.pack(posicion) for posicion in posiciones))
+	paquete.cerrar()
+	return cantidad
+
+def main():
+	parser = argparse.ArgumentParser(description="Convierte un archivo de niveles de texto a un paquete binario.")
+	parser.add_argument("texto", help="archivo de niveles de texto")
+	parser.add_argument("binario", nargs="?", help="paquete binario a crear (por defecto, el mismo nombre con extensión .sokb)")
+	args = parser.parse_args()
+	binario = args.binario
+	if binario is None:
+		binario = args.texto.rsplit(".", 1)[0] + EXTENSION
+	cantidad = convertir(args.texto, binario)
+	print(f"{cantidad} niveles convertidos a {binario}")
+
+if __name__ == "__main__":
+	main()
@@ -28,3 +28,11 @@ class Pila:
 			raise IndexError("La pila está vacía")
 		return self.items.pop()
 
+	def ver_tope(self):
+		"""
+		Devuelve el elemento tope sin eliminarlo de la pila.
+		Si la pila está vacía levanta una excepción.
+		"""
+		if self.esta_vacia():
+			raise IndexError("La pila está vacía")
+		return self.items[-1]
@@ -0,0 +1,65 @@
+from pila import Pila
+from backtracking import Semilla
+
+class SesionPista:
+	"""
+	Representa el plan de pistas de una partida. Mientras el jugador siga el
+	plan (con pistas o moviéndose por su cuenta) se conservan los movimientos
+	que faltan; sólo se descarta cuando el jugador se aparta de él. Guarda
+	además la semilla de la última búsqueda para que volver a planear desde
+	el estado en que se apartó no empiece de cero.
+	"""
+
+	def __init__(self):
+		"""Crea una sesión sin plan."""
+		self.plan = Pila()
+		self.semilla = Semilla()
+		self.sin_pista = False
+
+	def hay_pista(self):
+		"""Devuelve True si hay un plan con movimientos pendientes."""
+		return not self.plan.esta_vacia()
+
+	def cargar(self, direcciones):
+		"""Recibe la lista de direcciones de una solución y la usa como plan."""
+		self.sin_pista = False
+		self.plan = Pila()
+		for direccion in reversed(direcciones):
+			self.plan.apilar(direccion)
+
+	def pista(self):
+		"""Devuelve la dirección del próximo movimiento del plan y la quita del plan."""
+		return self.plan.desapilar()
+
+	def seguir(self, direccion):
+		"""
+		Recibe la dirección en la que se movió el jugador. Si coincide con el
+		próximo movimiento del plan, lo quita del plan y devuelve True. Caso
+		contrario descarta el plan y devuelve False.
+		"""
+		if self.hay_pista() and self.plan.ver_tope() == direccion:
+			self.plan.desapilar()
+			return True
+		self.descartar()
+		return False
+
+	def descartar(self):
+		"""Descarta el plan actual y el aviso de que no se encontró una pista."""
+		self.plan = Pila()
+		self.sin_pista = False
+
+	def no_encontrada(self):
+		"""
+		Registra que la búsqueda de una pista terminó sin encontrarla ni
+		demostrar que no la hay, para avisarle al jugador hasta que se mueva.
+		"""
+		self.descartar()
+		self.sin_pista = True
+
+	def empezar_nivel(self, nivel):
+		"""
+		Recibe el nivel (de estado.Nivel) que empieza a jugarse. Descarta el plan
+		y usa una semilla nueva con ese nivel.
+		"""
+		self.descartar()
+		self.semilla = Semilla(nivel)
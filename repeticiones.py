@@ -0,0 +1,190 @@
+"""
+Grabación, reproducción y verificación de partidas. Una repetición es una
+línea de texto con el índice del nivel (el primero es 0) y los movimientos
+en formato LURD: una letra por movimiento (u, d, l, r), en mayúscula si el
+movimiento empuja una caja. Por ejemplo:
+
+	12 ulLdrrUU
+
+El juego agrega una repetición al archivo de repeticiones cada vez que se
+gana o se reinicia un nivel y al terminar a mitad de un nivel, ya sea con
+la tecla de salir, cerrando la ventana o por un error. Las repeticiones se
+reproducen con el motor de bits de estado, sin usar la ventana del juego.
+
+Ejemplos:
+
+	python repeticiones.py verificar repeticiones.txt
+	python repeticiones.py verificar enviadas.txt --exigir-ganadas
+	python repeticiones.py ver 12 ulLdrrUU --movimiento 4
+"""
+
+import argparse
+import sys
+import estado
+from paquete_binario import abrir_paquete
+
+ARCHIVO_REPETICIONES = "repeticiones.txt"
+INTERVALO_PUNTOS_DE_CONTROL = 256
+GANADA = "ganada"
+INCOMPLETA = "incompleta"
+INVALIDA = "inválida"
+
+class Reproductor:
+	"""
+	Representa la reproducción de una repetición sobre la grilla inicial de su
+	nivel. Al crearse simula la repetición completa, verificando que todos los
+	movimientos sean válidos, y guarda el jugador y las cajas cada 'intervalo'
+	movimientos como punto de control. Así, ir a cualquier movimiento repite
+	a lo sumo 'intervalo' movimientos desde el punto de control anterior.
+	"""
+
+	def __init__(self, grilla, lurd, intervalo=INTERVALO_PUNTOS_DE_CONTROL):
+		"""
+		Recibe la grilla inicial del nivel y los movimientos en formato LURD.
+		Levanta ValueError si la cadena tiene letras inválidas o si algún
+		movimiento no se puede hacer.
+		"""
+		self.intervalo = intervalo
+		self.direcciones = estado.desde_lurd(lurd)
+		actual = estado.desde_grilla(grilla)
+		self.nivel = actual.nivel
+		self.puntos_de_control = []
+		for numero, direccion in enumerate(self.direcciones):
+			if numero % intervalo == 0:
+				self.puntos_de_control.append((actual.jugador, actual.cajas))
+			if actual.mover(direccion) is None:
+				raise ValueError(f"El movimiento {numero + 1} ({lurd[numero]}) no es válido")
+		if len(self.direcciones) % intervalo == 0:
+			self.puntos_de_control.append((actual.jugador, actual.cajas))
+
+	def __len__(self):
+		"""Devuelve la cantidad de movimientos de la repetición."""
+		return len(self.direcciones)
+
+	def estado_en(self, numero):
+		"""
+		Devuelve un nuevo estado (de estado.Estado) con la posición después de
+		'numero' movimientos, ajustando el número a la cantidad de movimientos.
+		"""
+		numero = max(0, min(numero, len(self)))
+		punto = numero // self.intervalo
+		jugador, cajas = self.puntos_de_control[punto]
+		actual = estado.Estado(self.nivel, jugador, cajas)
+		for direccion in self.direcciones[punto * self.intervalo:numero]:
+			actual.mover(direccion)
+		return actual
+
+	def ir_a(self, numero):
+		"""Devuelve la grilla después de 'numero' movimientos."""
+		return self.estado_en(numero).a_grilla()
+
+	def ganada(self):
+		"""Devuelve True si al terminar la repetición el nivel queda ganado."""
+		return self.estado_en(len(self)).juego_ganado()
+
+def formatear(nivel, lurd):
+	"""Devuelve la línea de texto de una repetición del nivel con los movimientos LURD recibidos."""
+	return f"{nivel} {lurd}"
+
+def interpretar(linea):
+	"""
+	Recibe una línea de texto de una repetición y devuelve el índice del
+	nivel y la cadena LURD. Levanta ValueError si la línea no tiene ese formato.
+	"""
+	partes = linea.split()
+	if len(partes) not in (1, 2) or not partes[0].isdigit():
+		raise ValueError(f"Repetición mal formada: {linea.strip()!r}")
+	lurd = partes[1] if len(partes) == 2 else ""
+	return int(partes[0]), lurd
+
+def guardar(ruta, nivel, lurd):
+	"""Agrega al final del archivo de repeticiones una repetición del nivel recibido."""
+	with open(ruta, "a") as archivo:
+		archivo.write(formatear(nivel, lurd) + "\n")
+
+def leer(ruta):
+	"""
+	Recibe la ruta de un archivo de repeticiones y devuelve un generador de
+	tuplas con el número de línea y el texto de cada repetición, salteando las
+	líneas vacías y las que empiezan con ';'.
+	"""
+	with open(ruta) as archivo:
+		for numero, linea in enumerate(archivo, 1):
+			linea = linea.strip()
+			if linea and not linea.startswith(";"):
+				yield numero, linea
+
+def verificar(inicial, lurd):
+	"""
+	Recibe el estado inicial de un nivel (que no se modifica) y los
+	movimientos en formato LURD. Simula los movimientos y devuelve una tupla
+	con el resultado (GANADA, INCOMPLETA o INVALIDA) y un texto que lo
+	detalla. Sólo se controla la dirección de cada letra, no si está en
+	mayúscula.
+	"""
+	try:
+		direcciones = estado.desde_lurd(lurd)
+	except ValueError as error:
+		return INVALIDA, str(error)
+	actual = inicial.copiar()
+	for numero, direccion in enumerate(direcciones, 1):
+		if actual.mover(direccion) is None:
+			return INVALIDA, f"el movimiento {numero} ({lurd[numero - 1]}) no es válido"
+	if actual.juego_ganado():
+		return GANADA, f"{len(direcciones)} movimientos"
+	return INCOMPLETA, f"{len(direcciones)} movimientos sin ganar el nivel"
+
+def verificar_repeticiones(niveles, repeticiones):
+	"""
+	Recibe los niveles y un iterable de tuplas (número de línea, texto de la
+	repetición), como las que devuelve leer. Devuelve un generador con un
+	diccionario por repetición con su línea, su nivel, el resultado y el
+	detalle. El estado inicial de cada nivel se calcula una sola vez.
+	"""
+	iniciales = {}
+	for linea, texto in repeticiones:
+		try:
+			nivel, lurd = interpretar(texto)
+		except ValueError as error:
+			yield {"linea": linea, "nivel": None, "resultado": INVALIDA, "detalle": str(error)}
+			continue
+		if nivel >= len(niveles):
+			yield {"linea": linea, "nivel": nivel, "resultado": INVALIDA, "detalle": f"no existe el nivel {nivel}"}
+			continue
+		if nivel not in iniciales:
+			iniciales[nivel] = estado.desde_grilla(niveles[nivel])
+		resultado, detalle = verificar(iniciales[nivel], lurd)
+		yield {"linea": linea, "nivel": nivel, "resultado": resultado, "detalle": detalle}
+
+def main():
+	parser = argparse.ArgumentParser(description="Verifica y reproduce repeticiones de partidas de Sokoban sin interfaz gráfica.")
+	parser.add_argument("--niveles", default="niveles.txt", help="archivo de niveles (de texto o un paquete binario .sokb)")
+	subcomandos = parser.add_subparsers(dest="comando", required=True)
+	verificacion = subcomandos.add_parser("verificar", help="verifica todas las repeticiones de un archivo")
+	verificacion.add_argument("archivo", nargs="?", default=ARCHIVO_REPETICIONES, help="archivo de repeticiones")
+	verificacion.add_argument("--exigir-ganadas", action="store_true", help="considera un error que una repetición no gane su nivel")
+	reproduccion = subcomandos.add_parser("ver", help="muestra la grilla de una repetición después de un movimiento")
+	reproduccion.add_argument("nivel", type=int, help="índice del nivel (el primero es 0)")
+	reproduccion.add_argument("lurd", nargs="?", default="", help="movimientos en formato LURD")
+	reproduccion.add_argument("--movimiento", type=int, default=None, help="número de movimiento (por defecto, el último)")
+	args = parser.parse_args()
+
+	niveles = abrir_paquete(args.niveles)
+	if args.comando == "ver":
+		reproductor = Reproductor(niveles[args.nivel], args.lurd)
+		niveles.cerrar()
+		numero = len(reproductor) if args.movimiento is None else args.movimiento
+		print("\n".join(reproductor.ir_a(numero)))
+		return
+	conteo = {GANADA: 0, INCOMPLETA: 0, INVALIDA: 0}
+	for verificacion in verificar_repeticiones(niveles, leer(args.archivo)):
+		conteo[verificacion["resultado"]] += 1
+		if verificacion["resultado"] != GANADA:
+			print(f"Línea {verificacion['linea']} (nivel {verificacion['nivel']}): {verificacion['resultado']}, {verificacion['detalle']}")
+	niveles.cerrar()
+	print(f"{sum(conteo.values())} repeticiones: {conteo[GANADA]} ganadas, {conteo[INCOMPLETA]} incompletas, {conteo[INVALIDA]} inválidas")
+	if conteo[INVALIDA] or (args.exigir_ganadas and conteo[INCOMPLETA]):
+		sys.exit(1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,137 @@
+"""
+Resuelve niveles de un archivo de niveles sin abrir la ventana del juego,
+repartiéndolos entre varios procesos. Por cada nivel escribe una fila en un
+archivo CSV con la longitud de la solución, los estados expandidos, el tiempo
+y la solución en formato LURD, junto con las estadísticas de la búsqueda. Con
+--cache también guarda las soluciones en el cache de pistas del juego y con
+--perfil guarda el perfil de cProfile de la búsqueda de cada nivel.
+
+Ejemplo:
+
+	python resolver.py --desde 0 --hasta 49 --procesos 8 --tiempo 60
+"""
+
+import argparse
+import cProfile
+import csv
+import multiprocessing
+import os
+import threading
+import time
+import estado
+import transposicion
+from instrumentacion import Estadisticas
+from paquete_binario import abrir_paquete
+from cache_soluciones import CacheSoluciones, ruta_cache
+from backtracking import buscar_solucion, LIMITE_NODOS, MOVIMIENTOS, EMPUJES, BIDIRECCIONAL
+
+TIEMPO_POR_NIVEL = 60
+MEMORIA_POR_NIVEL = 1024
+COLUMNAS = ("nivel", "resuelto", "movimientos", "expandidos", "podados", "duplicados", "profundidad_maxima", "frontera_maxima", "nodos_por_segundo", "segundos", "solucion")
+
+def limitar_memoria(megabytes):
+	"""
+	Limita la memoria del proceso actual a los megabytes recibidos. En los
+	sistemas que no lo permiten no hace nada.
+	"""
+	try:
+		import resource
+	except ImportError:
+		return
+	limite = megabytes * 1024 * 1024
+	resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+
+def resolver_nivel(argumentos):
+	"""
+	Recibe una tupla con el índice del nivel, su grilla, el tiempo máximo en
+	segundos, la cantidad máxima de estados a expandir, la memoria máxima en
+	megabytes, la carpeta donde guardar el perfil de la búsqueda (o None) y
+	el modo de búsqueda (ver backtracking.buscar_solucion). Busca la solución
+	y devuelve un diccionario con las columnas de COLUMNAS.
+	"""
+	indice, grilla, segundos, limite_nodos, megabytes, carpeta_perfil, modo = argumentos
+	perfil = None if carpeta_perfil is None else cProfile.Profile()
+	cancelar = threading.Event()
+	temporizador = threading.Timer(segundos, cancelar.set)
+	temporizador.start()
+	estadisticas = Estadisticas()
+	inicio = time.perf_counter()
+	try:
+		hay_solucion, movimientos = buscar_solucion(grilla, limite_nodos=limite_nodos, modo=modo, capacidad=transposicion.capacidad_para_memoria(megabytes // 2), cancelar=cancelar, estadisticas=estadisticas, perfil=perfil)
+	except MemoryError:
+		hay_solucion, movimientos = None, None
+	finally:
+		temporizador.cancel()
+	duracion = time.perf_counter() - inicio
+	if perfil is not None:
+		perfil.dump_stats(os.path.join(carpeta_perfil, f"nivel{indice}.prof"))
+	solucion = ""
+	if hay_solucion:
+		direcciones = []
+		while not movimientos.esta_vacia():
+			direcciones.append(movimientos.desapilar())
+		solucion = estado.a_lurd(estado.desde_grilla(grilla), direcciones)
+	resultado = {"nivel": indice, "resuelto": hay_solucion is True, "movimientos": len(solucion)}
+	resultado.update(estadisticas.como_diccionario())
+	resultado["segundos"] = round(duracion, 3)
+	resultado["solucion"] = solucion
+	return resultado
+
+def resolver_niveles(niveles, indices, procesos, segundos, limite_nodos, megabytes, carpeta_perfil=None, modo=EMPUJES):
+	"""
+	Recibe la lista de niveles, los índices de los niveles a resolver, los
+	límites de la búsqueda y, opcionalmente, la carpeta de los perfiles y el
+	modo de búsqueda.
+	Resuelve los niveles en un grupo de 'procesos' procesos y devuelve un
+	iterador con el resultado de cada nivel a medida que terminan.
+	"""
+	tareas = [(i, niveles[i], segundos, limite_nodos, megabytes, carpeta_perfil, modo) for i in indices]
+	with multiprocessing.Pool(procesos, initializer=limitar_memoria, initargs=(megabytes,), maxtasksperchild=1) as grupo:
+		yield from grupo.imap_unordered(resolver_nivel, tareas)
+
+def guardar_en_cache(niveles, resultados, ruta):
+	"""Guarda las soluciones encontradas en el cache de soluciones de la ruta recibida."""
+	cache = CacheSoluciones(ruta)
+	for resultado in resultados:
+		if resultado["resuelto"]:
+			cache.guardar(niveles[resultado["nivel"]], estado.desde_lurd(resultado["solucion"]))
+	cache.cerrar()
+
+def main():
+	parser = argparse.ArgumentParser(description="Resuelve niveles de Sokoban sin interfaz gráfica.")
+	parser.add_argument("--niveles", default="niveles.txt", help="archivo de niveles (de texto o un paquete binario .sokb)")
+	parser.add_argument("--desde", type=int, default=0, help="índice del primer nivel a resolver (el primero es 0)")
+	parser.add_argument("--hasta", type=int, default=None, help="índice del último nivel a resolver")
+	parser.add_argument("--procesos", type=int, default=os.cpu_count(), help="cantidad de procesos")
+	parser.add_argument("--tiempo", type=float, default=TIEMPO_POR_NIVEL, help="segundos máximos por nivel")
+	parser.add_argument("--nodos", type=int, default=LIMITE_NODOS, help="estados máximos a expandir por nivel")
+	parser.add_argument("--memoria", type=int, default=MEMORIA_POR_NIVEL, help="megabytes máximos por nivel")
+	parser.add_argument("--salida", default="soluciones.csv", help="archivo CSV de resultados")
+	parser.add_argument("--cache", action="store_true", help="guarda las soluciones en el cache de pistas del juego")
+	parser.add_argument("--modo", default=EMPUJES, choices=(EMPUJES, BIDIRECCIONAL, MOVIMIENTOS), help="modo de búsqueda")
+	parser.add_argument("--perfil", default=None, help="carpeta donde guardar el perfil de cProfile de cada nivel")
+	args = parser.parse_args()
+
+	niveles = abrir_paquete(args.niveles)
+	hasta = len(niveles) - 1 if args.hasta is None else args.hasta
+	indices = range(args.desde, hasta + 1)
+	if args.perfil is not None:
+		os.makedirs(args.perfil, exist_ok=True)
+	resultados = []
+	for resultado in resolver_niveles(niveles, indices, args.procesos, args.tiempo, args.nodos, args.memoria, args.perfil, args.modo):
+		estado_nivel = "resuelto" if resultado["resuelto"] else "sin solución"
+		print(f"Nivel {resultado['nivel']}: {estado_nivel} ({resultado['movimientos']} movimientos, {resultado['segundos']} s, {resultado['expandidos']} expandidos, {resultado['podados']} podados, {resultado['duplicados']} duplicados, profundidad {resultado['profundidad_maxima']})", flush=True)
+		resultados.append(resultado)
+	resultados.sort(key=lambda resultado: resultado["nivel"])
+	with open(args.salida, "w", newline="") as archivo:
+		escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS)
+		escritor.writeheader()
+		escritor.writerows(resultados)
+	if args.cache:
+		guardar_en_cache(niveles, resultados, ruta_cache(args.niveles))
+	niveles.cerrar()
+	resueltos = sum(1 for resultado in resultados if resultado["resuelto"])
+	print(f"{resueltos} de {len(resultados)} niveles resueltos. Resultados en {args.salida}")
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,64 @@
+import os
+import threading
+from backtracking import buscar_solucion, BIDIRECCIONAL, PARALELO
+from instrumentacion import Estadisticas
+
+class BusquedaEnSegundoPlano:
+	"""
+	Representa una búsqueda de solución que corre en un hilo aparte, para
+	que el juego pueda seguir dibujando y leyendo teclas mientras tanto.
+	"""
+
+	def __init__(self, grilla, semilla=None):
+		"""
+		Empieza a buscar la solución de la grilla recibida en un hilo nuevo,
+		reutilizando la semilla de una búsqueda anterior si se recibe.
+		"""
+		self.grilla = grilla
+		self.semilla = semilla
+		self.cancelada = threading.Event()
+		self.hay_solucion = None
+		self.movimientos = None
+		self.estadisticas = Estadisticas(progreso=self.avanzar)
+		self.progreso = 0
+		self.progreso_informado = 0
+		self.hilo = threading.Thread(target=self.buscar, args=(grilla,), daemon=True)
+		self.hilo.start()
+
+	def buscar(self, grilla):
+		"""
+		Busca la solución y guarda el resultado. Se ejecuta en el hilo de la
+		búsqueda. Si la máquina tiene más de un núcleo corre varias estrategias
+		a la vez, una por núcleo, y se queda con la primera solución.
+		"""
+		modo = PARALELO if (os.cpu_count() or 1) > 1 else BIDIRECCIONAL
+		self.hay_solucion, self.movimientos = buscar_solucion(grilla, modo=modo, cancelar=self.cancelada, estadisticas=self.estadisticas, semilla=self.semilla)
+
+	def avanzar(self, estadisticas):
+		"""Recibe las estadísticas de la búsqueda y guarda su progreso. Se ejecuta en el hilo de la búsqueda."""
+		self.progreso = estadisticas.expandidos
+
+	def hay_progreso_nuevo(self):
+		"""Devuelve True si la búsqueda avanzó desde la última vez que se preguntó."""
+		progreso = self.progreso
+		if progreso == self.progreso_informado:
+			return False
+		self.progreso_informado = progreso
+		return True
+
+	def termino(self):
+		"""Devuelve True si la búsqueda ya terminó."""
+		return not self.hilo.is_alive()
+
+	def cancelar(self):
+		"""Pide que la búsqueda se abandone lo antes posible."""
+		self.cancelada.set()
+
+	def resultado(self):
+		"""
+		Devuelve True y la pila de movimientos si la búsqueda encontró una
+		solución. Caso contrario devuelve False y None si demostró que no hay
+		solución, o None y None si no llegó a saberlo (ver
+		backtracking.buscar_solucion).
+		"""
+		return self.hay_solucion, self.movimientos
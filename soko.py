@@ -88,6 +88,25 @@ def mover(grilla, direccion):
     if hay_caja(grilla, columna_jugador + dx, fila_jugador + dy):
         nueva_grilla[fila_jugador + dy * 2] = mover_caja(nueva_grilla, columna_jugador + dx * 2, fila_jugador + dy * 2)
     return crear_grilla(nueva_grilla)
+
+def retroceder(grilla, direccion, con_caja):
+    '''Deshace un movimiento del jugador hecho en la dirección indicada.
+
+    Recibe la grilla posterior al movimiento, la dirección en que se movió el
+    jugador y si al moverse empujó una caja. Devuelve la grilla anterior al
+    movimiento, es decir, la que al moverse en esa dirección da la grilla
+    recibida: el jugador vuelve una celda hacia atrás y, si había empujado una
+    caja, la trae consigo. La grilla recibida NO se modifica.
+    '''
+    dx, dy = direccion
+    fila_jugador, columna_jugador = obtener_posicion_jugador(grilla)
+    nueva_grilla = grilla[:]
+    nueva_grilla[fila_jugador] = borrar_jugador(nueva_grilla, fila_jugador)
+    if con_caja:
+        nueva_grilla[fila_jugador + dy] = borrar_caja(nueva_grilla, columna_jugador + dx, fila_jugador + dy)
+        nueva_grilla[fila_jugador] = mover_caja(nueva_grilla, columna_jugador, fila_jugador)
+    nueva_grilla[fila_jugador - dy] = agregar_jugador(nueva_grilla, columna_jugador - dx, fila_jugador - dy)
+    return crear_grilla(nueva_grilla)
   
 def obtener_posicion_jugador(grilla): 
     '''Recibe una grilla y devuelve la fila y la columna en la que se encuentra el jugador'''
@@ -144,4 +163,17 @@ def mover_caja(nueva_grilla, columna_siguiente, fila_siguiente):
             fila_creada += CAJA
         else:
             fila_creada += nueva_grilla[fila_siguiente][i]
+    return fila_creada
+
+def borrar_caja(nueva_grilla, columna_caja, fila_caja):
+    '''Recibe una grilla, la fila y la columna en la que está una caja.
+    Devuelve esa fila sin la caja.'''
+    fila_creada = ""
+    for i in range(len(nueva_grilla[0])):
+        if i == columna_caja and hay_objetivo(nueva_grilla, columna_caja, fila_caja):
+            fila_creada += OBJETIVO
+        elif i == columna_caja:
+            fila_creada += CELDA_VACIA
+        else:
+            fila_creada += nueva_grilla[fila_caja][i]
     return fila_creada
\ No newline at end of file
@@ -0,0 +1,82 @@
+INFINITO = float("inf")
+CAPACIDAD = 1000000
+BYTES_POR_ENTRADA = 800
+FRACCION_DESALOJO = 0.25
+
+class TablaTransposicion:
+	"""
+	Representa una tabla de transposición de tamaño acotado. Guarda para cada
+	estado la menor profundidad con la que se lo alcanzó. Cuando se llena
+	desaloja los estados más profundos, que son los que menos conviene
+	recordar, así que la memoria usada no crece más allá de la capacidad.
+	"""
+
+	def __init__(self, capacidad=CAPACIDAD, verificar=False):
+		"""
+		Crea una tabla vacía con lugar para 'capacidad' estados. Si 'verificar'
+		es True también guarda el estado completo de cada firma para detectar
+		colisiones (ver clave).
+		"""
+		self.capacidad = capacidad
+		self.profundidades = {}
+		self.exactos = {} if verificar else None
+		self.desalojados = 0
+
+	def __len__(self):
+		return len(self.profundidades)
+
+	def __contains__(self, clave):
+		return clave in self.profundidades
+
+	def clave(self, firma, exacto):
+		"""
+		Recibe la firma Zobrist de un estado y el estado completo. Devuelve la
+		clave con la que se guarda el estado: la firma, salvo que se estén
+		verificando las colisiones y otro estado distinto ya la use, en cuyo
+		caso devuelve el estado completo.
+		"""
+		if self.exactos is None:
+			return firma
+		if self.exactos.setdefault(firma, exacto) == exacto:
+			return firma
+		return exacto
+
+	def profundidad(self, clave):
+		"""Devuelve la menor profundidad registrada para el estado, o infinito si no está."""
+		return self.profundidades.get(clave, INFINITO)
+
+	def registrar(self, clave, profundidad):
+		"""
+		Registra que se alcanzó el estado con la profundidad recibida. Devuelve
+		True si es la menor profundidad conocida para ese estado (y por lo tanto
+		hay que expandirlo) y False si ya se lo había alcanzado antes con una
+		profundidad menor o igual.
+		"""
+		if self.profundidades.get(clave, INFINITO) <= profundidad:
+			return False
+		self.profundidades[clave] = profundidad
+		if len(self.profundidades) > self.capacidad:
+			self.desalojar()
+		return True
+
+	def desalojar(self):
+		"""Elimina de la tabla la fracción FRACCION_DESALOJO de estados más profundos."""
+		cantidad = max(1, int(len(self.profundidades) * FRACCION_DESALOJO))
+		ordenadas = sorted(self.profundidades, key=self.profundidades.get, reverse=True)
+		for clave in ordenadas[:cantidad]:
+			del self.profundidades[clave]
+			if self.exactos is not None and not isinstance(clave, tuple):
+				self.exactos.pop(clave, None)
+		self.desalojados += cantidad
+
+def capacidad_para_memoria(megabytes):
+	"""
+	Devuelve la capacidad con la que una búsqueda ocupa a lo sumo los
+	megabytes recibidos. Cada unidad de capacidad cuesta BYTES_POR_ENTRADA:
+	una entrada de la tabla, un estado de la frontera con su rastro y una
+	cota guardada. La cifra sale de medir con tracemalloc el pico de memoria
+	de búsquedas del nivel 92 que llenan la tabla y la frontera (entre 590 y
+	790 bytes por unidad según el modo, sin verificar colisiones); no incluye
+	el intérprete ni los datos precalculados del nivel.
+	"""
+	return max(1, megabytes * 1024 * 1024 // BYTES_POR_ENTRADA)